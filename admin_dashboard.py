@@ -70,6 +70,8 @@ def run_async(coro):
     try:
         return loop.run_until_complete(coro)
     finally:
+        # Close pooled connections while the loop that opened them is running
+        loop.run_until_complete(orchestrator.mcp_client.aclose())
         loop.close()
 
 # Initialize services
@@ -1,5 +1,6 @@
 """Feedback Agent for collecting, analyzing, and processing user feedback."""
 
+import asyncio
 import logging
 import os
 from typing import Dict, Any, List, Optional
@@ -132,7 +133,10 @@ Provide your analysis in JSON format:
         try:
             model_name = os.getenv("MODEL_NAME", "gpt-4o")
             logger.info(f"Calling Azure OpenAI API for bias analysis with model: {model_name}")
-            response = self.openai_client.chat.completions.create(
+            # Run the blocking client call off the event loop so concurrent
+            # feedback can be analyzed in parallel
+            response = await asyncio.to_thread(
+                self.openai_client.chat.completions.create,
                 model=model_name,
                 messages=[
                     {"role": "system", "content": "You are an educational content bias expert."},
@@ -311,7 +315,10 @@ Format each section clearly with the difficulty level as a header."""
 
         try:
             model_name = os.getenv("MODEL_NAME", "gpt-4o")
-            response = self.openai_client.chat.completions.create(
+            # Run the blocking client call off the event loop so concurrent
+            # feedback can be analyzed in parallel
+            response = await asyncio.to_thread(
+                self.openai_client.chat.completions.create,
                 model=model_name,
                 messages=[
                     {"role": "system", "content": "You are an expert in inclusive education."},
@@ -193,10 +193,8 @@ class OrchestratorAgent:
         logger.info(f"Fetching dashboard data for user {user_id}")
         
         try:
-            # Gather all user data in parallel
-            user_profile = await self.mcp_client.get_user_profile(user_id)
-            gamification = await self.mcp_client.get_gamification_data(user_id)
-            quiz_history = await self.mcp_client.get_quiz_history(user_id)
+            # One bundle request instead of a round-trip per kind of data
+            user_profile, _, quiz_history, gamification = await self.mcp_client.get_user_bundle(user_id)
             
             return {
                 "user_profile": user_profile,
@@ -28,9 +28,9 @@ class PersonalizationAgent:
         
         try:
             # Retrieve user data from MCP
-            user_profile = await self.mcp_client.get_user_profile(user_id)
-            transactions = await self.mcp_client.get_recent_transactions(user_id, limit=10)
-            quiz_history = await self.mcp_client.get_quiz_history(user_id)
+            user_profile, transactions, quiz_history, gamification = await self.mcp_client.get_user_bundle(
+                user_id, limit=10
+            )
             
             # Analyze context
             context = {
@@ -40,6 +40,7 @@ class PersonalizationAgent:
                 "interests": user_profile.interests,
                 "recent_transactions": transactions,
                 "quiz_history": quiz_history,
+                "gamification": gamification,
                 "concept_performance": self._analyze_concept_performance(
                     quiz_history, concept
                 ),
@@ -59,6 +60,7 @@ class PersonalizationAgent:
                 "interests": [],
                 "recent_transactions": [],
                 "quiz_history": [],
+                "gamification": None,
                 "concept_performance": None,
                 "spending_patterns": {}
             }
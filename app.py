@@ -644,6 +644,10 @@ def run_async(coro):
     try:
         return loop.run_until_complete(coro)
     finally:
+        # Close pooled connections while the loop that opened them is running
+        mcp_client = st.session_state.get('mcp_client')
+        if mcp_client is not None:
+            loop.run_until_complete(mcp_client.aclose())
         loop.close()
 
 def load_existing_users():
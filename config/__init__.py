@@ -2,6 +2,7 @@
 
 import os
 import yaml
+from bisect import bisect_right
 from pathlib import Path
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field
@@ -33,8 +34,23 @@ class VectorStoreConfig(BaseModel):
     """Vector store configuration."""
     type: str = "faiss"
     index_path: str = "./data/vector_store/education.index"
-    metadata_path: str = "./data/vector_store/metadata.pkl"
+    metadata_path: str = "./data/vector_store/metadata.json"
+    documents_path: str = "./data/vector_store/documents.bin"
+    offsets_path: str = "./data/vector_store/documents.offsets.npy"
+    wal_path: str = "./data/vector_store/wal.bin"
+    manifest_path: str = "./data/vector_store/manifest.json"
+    wal_compact_bytes: int = 64 * 1024 * 1024  # Rewrite the index once the log grows past this
     top_k: int = 5
+    index_type: str = "hnsw"  # Options: flat, hnsw, ivf, ivfpq, sq_fp16, sq8
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    ivf_nlist: int = 100
+    ivf_nprobe: int = 8
+    pq_m: int = 16  # Must divide the embedding dimension
+    pq_nbits: int = 8
+    mmap_index: bool = False  # Map the saved index read-only so processes share its pages
+    sq8_rerank_factor: int = 0  # sq8 only: re-score top_k * factor hits with float32 vectors (0 disables)
 
 class GamificationConfig(BaseModel):
     """Gamification settings."""
@@ -60,6 +76,10 @@ class Config:
         self.vector_store = VectorStoreConfig(**self._config_data.get("vector_store", {}))
         self.gamification = GamificationConfig(**self._config_data.get("gamification", {}))
         
+        # Levels ordered by their lower bound, so a lookup is one bisect
+        self._levels_by_min = sorted(self.gamification.levels, key=lambda level: level["min_points"])
+        self._level_min_points = [level["min_points"] for level in self._levels_by_min]
+        
         # Additional settings
         self.age_groups = self._config_data.get("age_groups", [])
         self.financial_concepts = self._config_data.get("financial_concepts", [])
@@ -94,9 +114,9 @@ class Config:
     
     def get_level_for_points(self, points: int) -> Dict[str, Any]:
         """Determine user level based on points."""
-        for level in self.gamification.levels:
-            if level["min_points"] <= points <= level["max_points"]:
-                return level
+        i = bisect_right(self._level_min_points, points) - 1
+        if i >= 0 and points <= self._levels_by_min[i]["max_points"]:
+            return self._levels_by_min[i]
         return self.gamification.levels[-1]  # Return highest level if points exceed
 
 # Global configuration instance
@@ -1,29 +1,319 @@
 """SQLite database module for persistent storage of users, quizzes, and gamification data."""
 
-import sqlite3
+import atexit
 import json
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
 from datetime import datetime, date
 from pathlib import Path
 from contextlib import contextmanager
 from typing import Optional, List, Dict, Any
 
+logger = logging.getLogger(__name__)
+
 # Database file location
 DB_PATH = Path(__file__).parent / "data" / "quiz_data.db"
 
 
+# Compiled statements kept per connection (sqlite3's default is 128). The
+# pooled connections live as long as their thread, so with the SQL_* constants
+# below every hot statement is prepared once and then reused
+STATEMENT_CACHE_SIZE = 256
+
+# Per-connection tuning: with WAL, synchronous=NORMAL only syncs at checkpoints
+# instead of on every commit; the cache, temp tables and mmap stay in memory
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # ~20 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB
+)
+
+
+# One long-lived connection per thread, so SQLite's page cache stays warm
+# between calls; all of them are tracked so close_pool() can shut them down
+# and connections left behind by finished threads can be reclaimed
+_local = threading.local()
+_pool: Dict[threading.Thread, sqlite3.Connection] = {}
+_pool_lock = threading.Lock()
+_pool_generation = 0  # Bumped by close_pool() so other threads reconnect
+
+
+def _connect() -> sqlite3.Connection:
+    """Open and configure a new database connection."""
+    conn = sqlite3.connect(
+        str(DB_PATH),
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.row_factory = sqlite3.Row  # Enable column access by name
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _get_pooled_connection() -> sqlite3.Connection:
+    """Return this thread's connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.key != (DB_PATH, _pool_generation):
+        conn = _connect()
+        _local.conn = conn
+        _local.key = (DB_PATH, _pool_generation)
+        with _pool_lock:
+            for thread in [t for t in _pool if not t.is_alive()]:
+                _pool.pop(thread).close()
+            stale = _pool.pop(threading.current_thread(), None)
+            if stale is not None:
+                stale.close()
+            _pool[threading.current_thread()] = conn
+    return conn
+
+
+def close_pool():
+    """Close every pooled connection; the next call in each thread opens a fresh one."""
+    global _pool_generation
+    with _pool_lock:
+        for conn in _pool.values():
+            conn.close()
+        _pool.clear()
+        _pool_generation += 1
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def _savepoint(conn: sqlite3.Connection):
+    """Run the block in a savepoint, so a failure undoes only its own statements."""
+    # Releasing a savepoint opened outside a transaction commits it, so open
+    # one first and leave the commit to the connection's owner
+    if not conn.in_transaction:
+        conn.execute("BEGIN DEFERRED")
+    conn.execute("SAVEPOINT helper_call")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK TO helper_call")
+        conn.execute("RELEASE helper_call")
+        raise
+    conn.execute("RELEASE helper_call")
+
+
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections with automatic commit/rollback."""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row  # Enable column access by name
+    """
+    Context manager for database connections with automatic commit/rollback.
+    
+    Inside a batch() on the same thread the pooled connection is the batch's,
+    so the block joins its transaction through a savepoint instead of
+    committing or rolling back the caller's work.
+    """
+    conn = _get_pooled_connection()
+    if getattr(_local, 'batch_depth', 0):
+        with _savepoint(conn):
+            yield conn
+        return
+    
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        # Also reached on KeyboardInterrupt, cancellation or a failed commit;
+        # an open transaction would otherwise be committed by the thread's
+        # next helper call
+        if conn.in_transaction:
+            conn.rollback()
+
+
+@contextmanager
+def batch():
+    """
+    Run several helper calls in one transaction that is committed once on exit.
+    
+    Pass the yielded connection to the helpers through their ``conn`` argument:
+    
+        with batch() as conn:
+            save_user(..., conn=conn)
+            save_quiz_result(..., conn=conn)
+    
+    Helpers called without ``conn`` on the same thread join the batch as well.
+    A nested batch() becomes a savepoint of the outer one.
+    """
+    if getattr(_local, 'batch_depth', 0):
+        with get_db_connection() as conn:
+            yield conn
+        return
+    
+    conn = _get_pooled_connection()
+    if not conn.in_transaction:
+        conn.execute("BEGIN DEFERRED")
+    _local.batch_depth = 1
     try:
         yield conn
         conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
     finally:
-        conn.close()
+        _local.batch_depth = 0
+        if conn.in_transaction:
+            conn.rollback()
+
+
+@contextmanager
+def _use_connection(conn: Optional[sqlite3.Connection] = None):
+    """
+    Yield the caller's connection, or a committing one from get_db_connection.
+    
+    A caller's connection (from batch()) is wrapped in a savepoint, so a helper
+    that fails rolls back only its own statements, as it would on its own.
+    """
+    if conn is None:
+        with get_db_connection() as conn:
+            yield conn
+        return
+    
+    with _savepoint(conn):
+        yield conn
+
+
+def _raw_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """
+    Return a cursor that yields plain tuples instead of sqlite3.Row.
+    
+    The pooled connections default to Row for by-name access; the hottest
+    single-row reads unpack tuples instead and skip the per-row object.
+    The factory is set on the cursor so the shared connection is unaffected.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+# Full schema, run as one script so SQLite parses it in a single call;
+# every statement is idempotent, so it is safe on each startup
+SQL_SCHEMA = """
+    BEGIN;
+    
+    -- Users table
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        age INTEGER,
+        learning_style TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Quiz results table
+    CREATE TABLE IF NOT EXISTS quiz_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        quiz_id TEXT NOT NULL,
+        concept TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        total_questions INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    );
+    
+    -- Quiz answers table (detailed answer tracking)
+    CREATE TABLE IF NOT EXISTS quiz_answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_result_id INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        question_text TEXT NOT NULL,
+        correct_answer TEXT NOT NULL,
+        user_answer TEXT,
+        is_correct BOOLEAN NOT NULL,
+        answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (quiz_result_id) REFERENCES quiz_results(id)
+    );
+    
+    -- Gamification table
+    CREATE TABLE IF NOT EXISTS gamification (
+        user_id TEXT PRIMARY KEY,
+        total_points INTEGER DEFAULT 0,
+        level INTEGER DEFAULT 1,
+        quizzes_completed INTEGER DEFAULT 0,
+        streak_days INTEGER DEFAULT 0,
+        perfect_scores INTEGER DEFAULT 0,
+        last_activity_date DATE,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    );
+    
+    -- One row per hobby, interest and badge; rowid keeps insertion order
+    CREATE TABLE IF NOT EXISTS user_hobbies (
+        user_id TEXT NOT NULL,
+        hobby TEXT NOT NULL,
+        PRIMARY KEY (user_id, hobby),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS user_interests (
+        user_id TEXT NOT NULL,
+        interest TEXT NOT NULL,
+        PRIMARY KEY (user_id, interest),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS user_badges (
+        user_id TEXT NOT NULL,
+        badge TEXT NOT NULL,
+        awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, badge),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    );
+    
+    -- Feedback table; the full entry is kept as JSON in payload, with the
+    -- fields queries filter or aggregate on pulled out into columns
+    CREATE TABLE IF NOT EXISTS feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        feedback_id TEXT UNIQUE,
+        quiz_id TEXT,
+        user_id TEXT,
+        rating INTEGER,
+        difficulty_rating TEXT,
+        payload TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Backwards-compatible view exposing the lists as JSON arrays again
+    CREATE VIEW IF NOT EXISTS users_json AS
+    SELECT u.user_id, u.name, u.age,
+           (SELECT json_group_array(hobby) FROM
+            (SELECT hobby FROM user_hobbies h
+             WHERE h.user_id = u.user_id ORDER BY rowid)) AS hobbies,
+           (SELECT json_group_array(interest) FROM
+            (SELECT interest FROM user_interests i
+             WHERE i.user_id = u.user_id ORDER BY rowid)) AS interests,
+           u.learning_style, u.created_at, u.updated_at
+    FROM users u;
+    
+    -- Create indexes for better query performance
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_user 
+    ON quiz_results(user_id, completed_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_quiz_answers_result 
+    ON quiz_answers(quiz_result_id);
+    
+    -- Covers get_concept_statistics, so the aggregates never touch the table
+    DROP INDEX IF EXISTS idx_quiz_results_concept;
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_concept_score 
+    ON quiz_results(user_id, concept, percentage);
+    
+    -- Lets get_all_users walk users in name order without a sort
+    CREATE INDEX IF NOT EXISTS idx_users_name 
+    ON users(name);
+    
+    CREATE INDEX IF NOT EXISTS idx_feedback_quiz 
+    ON feedback(quiz_id);
+    
+    CREATE INDEX IF NOT EXISTS idx_feedback_user 
+    ON feedback(user_id);
+    
+    COMMIT;
+"""
 
 
 def init_database():
@@ -31,234 +321,358 @@ def init_database():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                age INTEGER,
-                hobbies TEXT,  -- JSON array
-                interests TEXT,  -- JSON array
-                learning_style TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Write-ahead logging lets readers run alongside a writer and turns
+        # each commit into an append; the mode is stored in the database file
+        conn.execute("PRAGMA journal_mode=WAL")
         
-        # Quiz results table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS quiz_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                quiz_id TEXT NOT NULL,
-                concept TEXT NOT NULL,
-                score INTEGER NOT NULL,
-                total_questions INTEGER NOT NULL,
-                percentage REAL NOT NULL,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
+        conn.executescript(SQL_SCHEMA)
         
-        # Quiz answers table (detailed answer tracking)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS quiz_answers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                quiz_result_id INTEGER NOT NULL,
-                question_id TEXT NOT NULL,
-                question_text TEXT NOT NULL,
-                correct_answer TEXT NOT NULL,
-                user_answer TEXT,
-                is_correct BOOLEAN NOT NULL,
-                answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (quiz_result_id) REFERENCES quiz_results(id)
-            )
-        """)
+        # Older versions kept these lists as JSON text columns. Look the
+        # columns up in the schema and, if present, move their contents into
+        # the link tables and drop them, so later startups skip all of this.
+        # SQLite before 3.35 cannot drop columns; they are cleared instead.
+        can_drop_columns = sqlite3.sqlite_version_info >= (3, 35, 0)
         
-        # Gamification table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS gamification (
-                user_id TEXT PRIMARY KEY,
-                total_points INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 1,
-                quizzes_completed INTEGER DEFAULT 0,
-                streak_days INTEGER DEFAULT 0,
-                perfect_scores INTEGER DEFAULT 0,
-                badges TEXT,  -- JSON array
-                last_activity_date DATE,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
-        
-        # Create indexes for better query performance
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_quiz_results_user 
-            ON quiz_results(user_id, completed_at DESC)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_quiz_answers_result 
-            ON quiz_answers(quiz_result_id)
-        """)
+        user_columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        if 'hobbies' in user_columns:
+            conn.execute("""
+                INSERT OR IGNORE INTO user_hobbies (user_id, hobby)
+                SELECT users.user_id, value FROM users, json_each(users.hobbies)
+                WHERE users.hobbies IS NOT NULL AND json_valid(users.hobbies)
+            """)
+            conn.execute("""
+                INSERT OR IGNORE INTO user_interests (user_id, interest)
+                SELECT users.user_id, value FROM users, json_each(users.interests)
+                WHERE users.interests IS NOT NULL AND json_valid(users.interests)
+            """)
+            if can_drop_columns:
+                conn.execute("ALTER TABLE users DROP COLUMN hobbies")
+                conn.execute("ALTER TABLE users DROP COLUMN interests")
+            else:
+                conn.execute("""
+                    UPDATE users SET hobbies = NULL, interests = NULL
+                    WHERE hobbies IS NOT NULL OR interests IS NOT NULL
+                """)
         
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_quiz_results_concept 
-            ON quiz_results(user_id, concept)
-        """)
+        gamification_columns = {row[1] for row in conn.execute("PRAGMA table_info(gamification)")}
+        if 'badges' in gamification_columns:
+            conn.execute("""
+                INSERT OR IGNORE INTO user_badges (user_id, badge)
+                SELECT gamification.user_id, value FROM gamification, json_each(gamification.badges)
+                WHERE gamification.badges IS NOT NULL AND json_valid(gamification.badges)
+            """)
+            if can_drop_columns:
+                conn.execute("ALTER TABLE gamification DROP COLUMN badges")
+            else:
+                conn.execute("UPDATE gamification SET badges = NULL WHERE badges IS NOT NULL")
+    
+    _import_legacy_feedback()
+
+
+def _import_legacy_feedback():
+    """
+    Move feedback that older versions kept next to the database into the feedback table.
+    
+    Each file is renamed to *.imported once its entries are committed, so
+    this only does work on the first startup after upgrading.
+    """
+    for legacy_file in (DB_PATH.parent / "feedback.jsonl", DB_PATH.parent / "feedback.json"):
+        if not legacy_file.exists():
+            continue
+        with open(legacy_file, 'r') as f:
+            if legacy_file.suffix == '.jsonl':
+                entries = []
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Blank or partial line
+            else:
+                entries = json.load(f)
+        # Entries already imported are skipped by feedback_id, so a failed
+        # rename just repeats a harmless import next time
+        if save_feedback(entries) is None:
+            continue
+        legacy_file.replace(legacy_file.with_name(legacy_file.name + '.imported'))
+
+
+# Statements are kept as fixed module-level strings so every call submits
+# identical SQL text and hits the connection's compiled-statement cache
+
+SQL_UPSERT_USER = """
+    INSERT INTO users (user_id, name, age, learning_style, updated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id) DO UPDATE SET
+        name = excluded.name,
+        age = excluded.age,
+        learning_style = excluded.learning_style,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+SQL_DELETE_USER_HOBBIES = "DELETE FROM user_hobbies WHERE user_id = ?"
+
+SQL_DELETE_USER_INTERESTS = "DELETE FROM user_interests WHERE user_id = ?"
+
+SQL_INSERT_USER_HOBBY = "INSERT OR IGNORE INTO user_hobbies (user_id, hobby) VALUES (?, ?)"
+
+SQL_INSERT_USER_INTEREST = "INSERT OR IGNORE INTO user_interests (user_id, interest) VALUES (?, ?)"
+
+SQL_INIT_GAMIFICATION = """
+    INSERT OR IGNORE INTO gamification (user_id)
+    VALUES (?)
+"""
+
+SQL_GET_USER = """
+    SELECT user_id, name, age, learning_style, 
+           created_at, updated_at
+    FROM users
+    WHERE user_id = ?
+"""
+
+SQL_GET_USER_LISTS = """
+    SELECT 'hobbies' AS list, hobby AS value, rowid AS position
+    FROM user_hobbies WHERE user_id = ?
+    UNION ALL
+    SELECT 'interests', interest, rowid
+    FROM user_interests WHERE user_id = ?
+    ORDER BY list, position
+"""
+
+SQL_GET_ALL_USERS = """
+    SELECT user_id, name, age, learning_style
+    FROM users
+    ORDER BY name
+"""
+
+SQL_GET_ALL_HOBBIES = "SELECT user_id, hobby FROM user_hobbies ORDER BY rowid"
+
+SQL_GET_ALL_INTERESTS = "SELECT user_id, interest FROM user_interests ORDER BY rowid"
+
+SQL_INSERT_QUIZ_RESULT = """
+    INSERT INTO quiz_results 
+    (user_id, quiz_id, concept, score, total_questions, percentage)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERT_QUIZ_ANSWER = """
+    INSERT INTO quiz_answers 
+    (quiz_result_id, question_id, question_text, correct_answer, 
+     user_answer, is_correct)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SQL_GET_QUIZ_HISTORY = """
+    SELECT id, quiz_id, concept, score, total_questions, 
+           percentage, completed_at
+    FROM quiz_results
+    WHERE user_id = ?
+    ORDER BY completed_at DESC
+    LIMIT ?
+"""
+
+SQL_GET_QUIZ_RESULT = """
+    SELECT id, user_id, quiz_id, concept, score, total_questions, 
+           percentage, completed_at
+    FROM quiz_results
+    WHERE id = ?
+"""
+
+SQL_GET_QUIZ_ANSWERS = """
+    SELECT question_id, question_text, correct_answer, 
+           user_answer, is_correct, answered_at
+    FROM quiz_answers
+    WHERE quiz_result_id = ?
+    ORDER BY id
+"""
+
+SQL_GET_CONCEPT_STATISTICS = """
+    SELECT 
+        concept,
+        COUNT(*) as attempts,
+        ROUND(AVG(percentage), 1) as avg_score,
+        ROUND(MAX(percentage), 1) as best_score,
+        ROUND(MIN(percentage), 1) as worst_score
+    FROM quiz_results
+    WHERE user_id = ?
+    GROUP BY concept
+    ORDER BY attempts DESC, AVG(percentage) DESC
+"""
+
+SQL_GET_GAMIFICATION = """
+    SELECT total_points, level, quizzes_completed, streak_days, 
+           perfect_scores, last_activity_date
+    FROM gamification
+    WHERE user_id = ?
+"""
+
+# Applies one completed quiz in a single statement: creates the row on a
+# user's first quiz, otherwise adds the points (100 per level) and works out
+# the streak from the days since last_activity_date. SET expressions all
+# see the row as it was before the update.
+SQL_RECORD_QUIZ_GAMIFICATION = """
+    INSERT INTO gamification (user_id, total_points, level, quizzes_completed,
+                              streak_days, perfect_scores, last_activity_date)
+    VALUES (:user_id, :points, :points / 100 + 1, 1, 1, :perfect, :today)
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_points = COALESCE(total_points, 0) + :points,
+        level = (COALESCE(total_points, 0) + :points) / 100 + 1,
+        quizzes_completed = COALESCE(quizzes_completed, 0) + 1,
+        perfect_scores = COALESCE(perfect_scores, 0) + :perfect,
+        streak_days = CASE julianday(:today) - julianday(last_activity_date)
+            WHEN 1 THEN COALESCE(streak_days, 0) + 1  -- Consecutive day
+            WHEN 0 THEN COALESCE(NULLIF(streak_days, 0), 1)  -- Same day
+            ELSE 1  -- Streak broken, or no previous activity
+        END,
+        last_activity_date = :today
+"""
+
+SQL_GET_BADGES = "SELECT badge FROM user_badges WHERE user_id = ? ORDER BY rowid"
+
+SQL_INSERT_BADGE = "INSERT OR IGNORE INTO user_badges (user_id, badge) VALUES (?, ?)"
+
+SQL_INSERT_FEEDBACK = """
+    INSERT OR IGNORE INTO feedback (feedback_id, quiz_id, user_id, rating, difficulty_rating, payload)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SQL_GET_ALL_FEEDBACK = "SELECT payload FROM feedback ORDER BY id"
+
+SQL_GET_QUIZ_FEEDBACK = "SELECT payload FROM feedback WHERE quiz_id = ? ORDER BY id"
+
+SQL_GET_USER_FEEDBACK = "SELECT payload FROM feedback WHERE user_id = ? ORDER BY id"
+
+SQL_GET_AVERAGE_RATING = "SELECT AVG(rating) FROM feedback"
+
+SQL_GET_DIFFICULTY_COUNTS = """
+    SELECT difficulty_rating, COUNT(*) AS count
+    FROM feedback
+    WHERE difficulty_rating IS NOT NULL
+    GROUP BY difficulty_rating
+"""
 
 
 def save_user(user_id: str, name: str, age: Optional[int] = None, 
               hobbies: Optional[List[str]] = None, interests: Optional[List[str]] = None,
-              learning_style: Optional[str] = None) -> bool:
+              learning_style: Optional[str] = None,
+              conn: Optional[sqlite3.Connection] = None) -> bool:
     """Save or update user profile in the database."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Convert lists to JSON strings
-            hobbies_json = json.dumps(hobbies) if hobbies else None
-            interests_json = json.dumps(interests) if interests else None
+        with _use_connection(conn) as conn:
+            conn.execute(SQL_UPSERT_USER, (user_id, name, age, learning_style))
             
-            cursor.execute("""
-                INSERT INTO users (user_id, name, age, hobbies, interests, learning_style, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    name = excluded.name,
-                    age = excluded.age,
-                    hobbies = excluded.hobbies,
-                    interests = excluded.interests,
-                    learning_style = excluded.learning_style,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (user_id, name, age, hobbies_json, interests_json, learning_style))
+            # Replace the user's hobby and interest rows
+            conn.execute(SQL_DELETE_USER_HOBBIES, (user_id,))
+            conn.execute(SQL_DELETE_USER_INTERESTS, (user_id,))
+            conn.executemany(SQL_INSERT_USER_HOBBY, [(user_id, hobby) for hobby in hobbies or []])
+            conn.executemany(SQL_INSERT_USER_INTEREST, [(user_id, interest) for interest in interests or []])
             
             # Initialize gamification data if new user
-            cursor.execute("""
-                INSERT OR IGNORE INTO gamification (user_id)
-                VALUES (?)
-            """, (user_id,))
+            conn.execute(SQL_INIT_GAMIFICATION, (user_id,))
             
         return True
     except Exception as e:
-        print(f"Error saving user: {e}")
+        logger.error("Error saving user: %s", e)
         return False
 
 
-def get_user(user_id: str) -> Optional[Dict[str, Any]]:
+def get_user(user_id: str, conn: Optional[sqlite3.Connection] = None) -> Optional[Dict[str, Any]]:
     """Retrieve user profile from the database."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT user_id, name, age, hobbies, interests, learning_style, 
-                       created_at, updated_at
-                FROM users
-                WHERE user_id = ?
-            """, (user_id,))
-            
-            row = cursor.fetchone()
+        with _use_connection(conn) as conn:
+            cursor = _raw_cursor(conn)
+            row = cursor.execute(SQL_GET_USER, (user_id,)).fetchone()
             if row:
+                user_id, name, age, learning_style, created_at, updated_at = row
+                lists = {'hobbies': [], 'interests': []}
+                for list_name, value, _ in cursor.execute(SQL_GET_USER_LISTS, (user_id, user_id)):
+                    lists[list_name].append(value)
+                
                 return {
-                    'user_id': row['user_id'],
-                    'name': row['name'],
-                    'age': row['age'],
-                    'hobbies': json.loads(row['hobbies']) if row['hobbies'] else [],
-                    'interests': json.loads(row['interests']) if row['interests'] else [],
-                    'learning_style': row['learning_style'],
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
+                    'user_id': user_id,
+                    'name': name,
+                    'age': age,
+                    'hobbies': lists['hobbies'],
+                    'interests': lists['interests'],
+                    'learning_style': learning_style,
+                    'created_at': created_at,
+                    'updated_at': updated_at
                 }
             return None
     except Exception as e:
-        print(f"Error retrieving user: {e}")
+        logger.error("Error retrieving user: %s", e)
         return None
 
 
-def get_all_users() -> List[Dict[str, Any]]:
+def get_all_users(conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
     """Retrieve all users from the database."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT user_id, name, age, hobbies, interests, learning_style
-                FROM users
-                ORDER BY name
-            """)
+        with _use_connection(conn) as conn:
+            rows = conn.execute(SQL_GET_ALL_USERS).fetchall()
+            
+            # Two bulk queries for the lists instead of one pair per user
+            hobbies = defaultdict(list)
+            for user_id, hobby in conn.execute(SQL_GET_ALL_HOBBIES):
+                hobbies[user_id].append(hobby)
+            interests = defaultdict(list)
+            for user_id, interest in conn.execute(SQL_GET_ALL_INTERESTS):
+                interests[user_id].append(interest)
             
             users = []
-            for row in cursor.fetchall():
+            for row in rows:
                 users.append({
                     'user_id': row['user_id'],
                     'name': row['name'],
                     'age': row['age'],
-                    'hobbies': json.loads(row['hobbies']) if row['hobbies'] else [],
-                    'interests': json.loads(row['interests']) if row['interests'] else [],
+                    'hobbies': hobbies.get(row['user_id'], []),
+                    'interests': interests.get(row['user_id'], []),
                     'learning_style': row['learning_style']
                 })
             return users
     except Exception as e:
-        print(f"Error retrieving users: {e}")
+        logger.error("Error retrieving users: %s", e)
         return []
 
 
 def save_quiz_result(user_id: str, quiz_id: str, concept: str, score: int, 
-                     total_questions: int, answers: List[Dict[str, Any]]) -> Optional[int]:
+                     total_questions: int, answers: List[Dict[str, Any]],
+                     conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
     """Save quiz result and detailed answers to the database."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
+        with _use_connection(conn) as conn:
             # Calculate percentage
             percentage = (score / total_questions * 100) if total_questions > 0 else 0
             
             # Insert quiz result
-            cursor.execute("""
-                INSERT INTO quiz_results 
-                (user_id, quiz_id, concept, score, total_questions, percentage)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, quiz_id, concept, score, total_questions, percentage))
-            
-            quiz_result_id = cursor.lastrowid
+            quiz_result_id = conn.execute(
+                SQL_INSERT_QUIZ_RESULT, (user_id, quiz_id, concept, score, total_questions, percentage)
+            ).lastrowid
             
-            # Insert detailed answers
-            for answer in answers:
-                cursor.execute("""
-                    INSERT INTO quiz_answers 
-                    (quiz_result_id, question_id, question_text, correct_answer, 
-                     user_answer, is_correct)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
+            # Insert detailed answers; executemany binds each row to one prepared statement
+            conn.executemany(SQL_INSERT_QUIZ_ANSWER, [
+                (
                     quiz_result_id,
                     answer.get('question_id', ''),
                     answer.get('question_text', ''),
                     answer.get('correct_answer', ''),
                     answer.get('user_answer', ''),
                     answer.get('is_correct', False)
-                ))
+                )
+                for answer in answers
+            ])
             
             return quiz_result_id
     except Exception as e:
-        print(f"Error saving quiz result: {e}")
+        logger.error("Error saving quiz result: %s", e)
         return None
 
 
-def get_quiz_history(user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+def get_quiz_history(user_id: str, limit: int = 50,
+                     conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
     """Retrieve quiz history for a user."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, quiz_id, concept, score, total_questions, 
-                       percentage, completed_at
-                FROM quiz_results
-                WHERE user_id = ?
-                ORDER BY completed_at DESC
-                LIMIT ?
-            """, (user_id, limit))
-            
+        with _use_connection(conn) as conn:
             history = []
-            for row in cursor.fetchall():
+            for row in conn.execute(SQL_GET_QUIZ_HISTORY, (user_id, limit)).fetchall():
                 # Parse datetime string to datetime object
                 completed_at = row['completed_at']
                 if isinstance(completed_at, str):
@@ -278,39 +692,23 @@ def get_quiz_history(user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
                 })
             return history
     except Exception as e:
-        print(f"Error retrieving quiz history: {e}")
+        logger.error("Error retrieving quiz history: %s", e)
         return []
 
 
-def get_quiz_details(quiz_result_id: int) -> Optional[Dict[str, Any]]:
+def get_quiz_details(quiz_result_id: int,
+                     conn: Optional[sqlite3.Connection] = None) -> Optional[Dict[str, Any]]:
     """Retrieve detailed quiz result including all answers."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
+        with _use_connection(conn) as conn:
             # Get quiz result
-            cursor.execute("""
-                SELECT id, user_id, quiz_id, concept, score, total_questions, 
-                       percentage, completed_at
-                FROM quiz_results
-                WHERE id = ?
-            """, (quiz_result_id,))
-            
-            result_row = cursor.fetchone()
+            result_row = conn.execute(SQL_GET_QUIZ_RESULT, (quiz_result_id,)).fetchone()
             if not result_row:
                 return None
             
             # Get all answers
-            cursor.execute("""
-                SELECT question_id, question_text, correct_answer, 
-                       user_answer, is_correct, answered_at
-                FROM quiz_answers
-                WHERE quiz_result_id = ?
-                ORDER BY id
-            """, (quiz_result_id,))
-            
             answers = []
-            for row in cursor.fetchall():
+            for row in conn.execute(SQL_GET_QUIZ_ANSWERS, (quiz_result_id,)).fetchall():
                 answers.append({
                     'question_id': row['question_id'],
                     'question_text': row['question_text'],
@@ -332,65 +730,49 @@ def get_quiz_details(quiz_result_id: int) -> Optional[Dict[str, Any]]:
                 'answers': answers
             }
     except Exception as e:
-        print(f"Error retrieving quiz details: {e}")
+        logger.error("Error retrieving quiz details: %s", e)
         return None
 
 
-def get_concept_statistics(user_id: str) -> List[Dict[str, Any]]:
+def get_concept_statistics(user_id: str,
+                           conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
     """Get aggregated statistics by concept for a user."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    concept,
-                    COUNT(*) as attempts,
-                    AVG(percentage) as avg_score,
-                    MAX(percentage) as best_score,
-                    MIN(percentage) as worst_score
-                FROM quiz_results
-                WHERE user_id = ?
-                GROUP BY concept
-                ORDER BY attempts DESC, avg_score DESC
-            """, (user_id,))
-            
+        with _use_connection(conn) as conn:
             stats = []
-            for row in cursor.fetchall():
+            for row in conn.execute(SQL_GET_CONCEPT_STATISTICS, (user_id,)).fetchall():
                 stats.append({
                     'concept': row['concept'],
                     'attempts': row['attempts'],
-                    'avg_score': round(row['avg_score'], 1),
-                    'best_score': round(row['best_score'], 1),
-                    'worst_score': round(row['worst_score'], 1)
+                    'avg_score': row['avg_score'],
+                    'best_score': row['best_score'],
+                    'worst_score': row['worst_score']
                 })
             return stats
     except Exception as e:
-        print(f"Error retrieving concept statistics: {e}")
+        logger.error("Error retrieving concept statistics: %s", e)
         return []
 
 
-def get_gamification_data(user_id: str) -> Dict[str, Any]:
+def get_gamification_data(user_id: str,
+                          conn: Optional[sqlite3.Connection] = None) -> Dict[str, Any]:
     """Retrieve gamification data for a user."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT total_points, level, quizzes_completed, streak_days, 
-                       perfect_scores, badges, last_activity_date
-                FROM gamification
-                WHERE user_id = ?
-            """, (user_id,))
-            
-            row = cursor.fetchone()
+        with _use_connection(conn) as conn:
+            cursor = _raw_cursor(conn)
+            row = cursor.execute(SQL_GET_GAMIFICATION, (user_id,)).fetchone()
             if row:
+                (total_points, level, quizzes_completed, streak_days,
+                 perfect_scores, last_activity_date) = row
+                badges = [badge for (badge,) in cursor.execute(SQL_GET_BADGES, (user_id,))]
                 return {
-                    'total_points': row['total_points'] or 0,
-                    'level': row['level'] or 1,
-                    'quizzes_completed': row['quizzes_completed'] or 0,
-                    'streak_days': row['streak_days'] or 0,
-                    'perfect_scores': row['perfect_scores'] or 0,
-                    'badges': json.loads(row['badges']) if row['badges'] else [],
-                    'last_activity_date': row['last_activity_date']
+                    'total_points': total_points or 0,
+                    'level': level or 1,
+                    'quizzes_completed': quizzes_completed or 0,
+                    'streak_days': streak_days or 0,
+                    'perfect_scores': perfect_scores or 0,
+                    'badges': badges,
+                    'last_activity_date': last_activity_date
                 }
             else:
                 # Return default values if no record exists
@@ -404,7 +786,7 @@ def get_gamification_data(user_id: str) -> Dict[str, Any]:
                     'last_activity_date': None
                 }
     except Exception as e:
-        print(f"Error retrieving gamification data: {e}")
+        logger.error("Error retrieving gamification data: %s", e)
         return {
             'total_points': 0,
             'level': 1,
@@ -418,85 +800,89 @@ def get_gamification_data(user_id: str) -> Dict[str, Any]:
 
 def update_gamification_data(user_id: str, points_earned: int, 
                             is_perfect_score: bool = False,
-                            new_badges: Optional[List[str]] = None) -> bool:
+                            new_badges: Optional[List[str]] = None,
+                            conn: Optional[sqlite3.Connection] = None) -> bool:
     """Update gamification data after quiz completion."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        with _use_connection(conn) as conn:
+            # Points, level and streak are computed by SQLite in the upsert
+            conn.execute(SQL_RECORD_QUIZ_GAMIFICATION, {
+                'user_id': user_id,
+                'points': points_earned,
+                'perfect': 1 if is_perfect_score else 0,
+                'today': date.today().isoformat()
+            })
             
-            # Get current data
-            cursor.execute("""
-                SELECT total_points, level, quizzes_completed, streak_days, 
-                       perfect_scores, badges, last_activity_date
-                FROM gamification
-                WHERE user_id = ?
-            """, (user_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                # Initialize if doesn't exist
-                cursor.execute("""
-                    INSERT INTO gamification (user_id)
-                    VALUES (?)
-                """, (user_id,))
-                row = cursor.execute("""
-                    SELECT total_points, level, quizzes_completed, streak_days, 
-                           perfect_scores, badges, last_activity_date
-                    FROM gamification
-                    WHERE user_id = ?
-                """, (user_id,)).fetchone()
-            
-            # Calculate new values
-            total_points = (row['total_points'] or 0) + points_earned
-            quizzes_completed = (row['quizzes_completed'] or 0) + 1
-            perfect_scores = (row['perfect_scores'] or 0) + (1 if is_perfect_score else 0)
-            
-            # Calculate level (100 points per level)
-            level = (total_points // 100) + 1
-            
-            # Calculate streak
-            last_activity = row['last_activity_date']
-            today = date.today()
-            
-            if last_activity:
-                if isinstance(last_activity, str):
-                    last_activity = date.fromisoformat(last_activity)
-                
-                days_diff = (today - last_activity).days
-                if days_diff == 1:
-                    # Consecutive day
-                    streak_days = (row['streak_days'] or 0) + 1
-                elif days_diff == 0:
-                    # Same day
-                    streak_days = row['streak_days'] or 1
-                else:
-                    # Streak broken
-                    streak_days = 1
-            else:
-                streak_days = 1
-            
-            # Update badges
-            current_badges = json.loads(row['badges']) if row['badges'] else []
+            # Add new badges; the primary key drops ones the user already has
             if new_badges:
-                current_badges.extend(new_badges)
-                current_badges = list(set(current_badges))  # Remove duplicates
-            badges_json = json.dumps(current_badges)
-            
-            # Update database
-            cursor.execute("""
-                UPDATE gamification
-                SET total_points = ?,
-                    level = ?,
-                    quizzes_completed = ?,
-                    streak_days = ?,
-                    perfect_scores = ?,
-                    badges = ?,
-                    last_activity_date = ?
-                WHERE user_id = ?
-            """, (total_points, level, quizzes_completed, streak_days, 
-                  perfect_scores, badges_json, today.isoformat(), user_id))
+                conn.executemany(SQL_INSERT_BADGE, [(user_id, badge) for badge in new_badges])
             
         return True
     except Exception as e:
-        print(f"Error updating gamification data: {e}")
+        logger.error("Error updating gamification data: %s", e)
         return False
+
+
+def save_feedback(entries: List[Dict[str, Any]],
+                  conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
+    """Store feedback entries, skipping any whose feedback_id is already saved.
+    
+    Returns the number of new rows, or None if the entries could not be saved.
+    """
+    try:
+        with _use_connection(conn) as conn:
+            cursor = conn.executemany(SQL_INSERT_FEEDBACK, [
+                (
+                    entry.get('feedback_id'),
+                    entry.get('quiz_id'),
+                    entry.get('user_id'),
+                    entry.get('rating', 0),
+                    entry.get('difficulty_rating'),
+                    json.dumps(entry)
+                )
+                for entry in entries
+            ])
+            return cursor.rowcount
+    except Exception as e:
+        logger.error("Error saving feedback: %s", e)
+        return None
+
+
+def get_feedback(quiz_id: Optional[str] = None, user_id: Optional[str] = None,
+                 conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
+    """Retrieve feedback entries in insertion order, optionally for one quiz or user."""
+    try:
+        with _use_connection(conn) as conn:
+            if quiz_id is not None:
+                cursor = conn.execute(SQL_GET_QUIZ_FEEDBACK, (quiz_id,))
+            elif user_id is not None:
+                cursor = conn.execute(SQL_GET_USER_FEEDBACK, (user_id,))
+            else:
+                cursor = conn.execute(SQL_GET_ALL_FEEDBACK)
+            
+            return [json.loads(payload) for (payload,) in cursor.fetchall()]
+    except Exception as e:
+        logger.error("Error retrieving feedback: %s", e)
+        return []
+
+
+def get_average_feedback_rating(conn: Optional[sqlite3.Connection] = None) -> float:
+    """Get the average rating across all feedback."""
+    try:
+        with _use_connection(conn) as conn:
+            (average,) = conn.execute(SQL_GET_AVERAGE_RATING).fetchone()
+            return average or 0.0
+    except Exception as e:
+        logger.error("Error retrieving average rating: %s", e)
+        return 0.0
+
+
+def get_difficulty_counts(conn: Optional[sqlite3.Connection] = None) -> Dict[str, int]:
+    """Count feedback entries per difficulty rating."""
+    try:
+        with _use_connection(conn) as conn:
+            rows = conn.execute(SQL_GET_DIFFICULTY_COUNTS).fetchall()
+            return {row['difficulty_rating']: row['count'] for row in rows}
+    except Exception as e:
+        logger.error("Error retrieving difficulty counts: %s", e)
+        return {}
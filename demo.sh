@@ -37,6 +37,7 @@ if python -c "import streamlit" 2>/dev/null; then
 else
     echo "⚠ Installing dependencies..."
     pip install -q -r requirements.txt
+    pip install -q -e .
     echo "✓ Dependencies installed"
 fi
 
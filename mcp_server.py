@@ -4,6 +4,7 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import json
+import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 import random
@@ -13,6 +14,8 @@ from models import (
     GamificationData
 )
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="Financial Education MCP Server",
     description="Multi-Controller Proxy for user data",
@@ -145,12 +148,31 @@ async def get_gamification_data(user_id: str = Query(..., description="User ID")
 @app.post("/api/user/gamification/update")
 async def update_gamification_data(gamif_data: GamificationData):
     """Update gamification data."""
-    print(f"🔄 MCP SERVER: Received gamification update for user {gamif_data.user_id}")
-    print(f"   Points: {gamif_data.total_points}, Level: {gamif_data.level}, Quizzes: {gamif_data.quizzes_completed}")
+    logger.debug(
+        "Received gamification update for user %s: points=%d, level=%s, quizzes=%d",
+        gamif_data.user_id, gamif_data.total_points, gamif_data.level, gamif_data.quizzes_completed
+    )
     gamification_db[gamif_data.user_id] = gamif_data
-    print(f"✅ MCP SERVER: Updated successfully. Database now has: {gamification_db[gamif_data.user_id].model_dump()}")
     return {"status": "success"}
 
+@app.get("/api/user/bundle")
+async def get_user_bundle(
+    user_id: str = Query(..., description="User ID"),
+    limit: int = Query(10, description="Number of transactions")
+):
+    """Get profile, transactions, quiz history and gamification data in one call."""
+    profile = await get_user_profile(user_id)
+    transactions = await get_transactions(user_id, limit)
+    history = await get_quiz_history(user_id)
+    gamification = await get_gamification_data(user_id)
+    
+    return {
+        "profile": profile,
+        "transactions": transactions["transactions"],
+        "quiz_history": history["history"],
+        "gamification": gamification
+    }
+
 def generate_sample_transactions(user_id: str) -> List[Transaction]:
     """Generate sample transactions for demo."""
     categories = ["Food", "Entertainment", "Savings", "Education", "Gifts"]
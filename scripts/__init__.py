@@ -0,0 +1 @@
+"""Command-line scripts for managing the Financial Education Quiz Engine."""
@@ -1,50 +1,91 @@
 """Script to populate the vector store with financial education knowledge."""
 
+import os
 import sys
-import json
+import logging
+import hashlib
+import asyncio
+import queue
+import threading
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 
-from services.rag_service import RAGService
+import torch
+from tqdm import tqdm
 
-def load_json_knowledge_base():
-    """Load financial education knowledge from JSON files."""
-    
-    # Get the project root directory
-    project_root = Path(__file__).parent.parent
-    knowledge_base_dir = project_root / "data" / "knowledge_base"
-    
-    # List of JSON files to load
-    json_files = [
-        "Class_6.json",
-        "Class_7.json",
-        "Class_8.json",
-        "Class_9.json",
-        "Class_10.json"
-    ]
-    
-    documents = []
-    metadata = []
-    
-    print("Loading knowledge from JSON files...")
+from services.rag_service import RAGService, TRAIN_SAMPLE_SIZE
+from config import config
+from utils.json_utils import read_json
+
+logger = logging.getLogger(__name__)
+
+NL = "\n"
+
+# Progress bars only make sense on an interactive terminal
+SHOW_PROGRESS = sys.stderr.isatty()
+
+# Number of documents embedded between index checkpoints
+CHECKPOINT_EVERY = 500
+
+# Number of documents embedded per add_documents call while streaming
+STREAM_BATCH_SIZE = 64
+
+# Maximum number of parsed batches waiting to be embedded
+PIPELINE_DEPTH = 4
+
+# (age_group, difficulty) tuples shared by every topic of a class level
+BEGINNER = ("6-9", "beginner")
+INTERMEDIATE = ("10-12", "intermediate")
+ADVANCED = ("13-17", "advanced")
+
+# Keyword patterns mapping topic names to financial concepts, checked in
+# priority order (first match wins). Keywords match as substrings, so
+# "savings" hits "saving" and "needs" hits "need".
+CONCEPT_PATTERNS = (
+    (re.compile(r"saving|save"), "saving"),
+    (re.compile(r"budget|expense|planning"), "budgeting"),
+    (re.compile(r"need|want|essential"), "needs_vs_wants"),
+    (re.compile(r"earn|income|salary|wage"), "earning"),
+    (re.compile(r"interest|compound|growth"), "compound_interest"),
+    (re.compile(r"risk|reward|investment|stock"), "risk_reward"),
+    (re.compile(r"barter|money|currency|trade"), "money_basics"),
+    (re.compile(r"borrow|loan|credit|debt"), "borrowing"),
+    (re.compile(r"bank|rbi|financial"), "banking"),
+    (re.compile(r"tax|gst"), "taxation"),
+)
+
+# All concept keywords in a single alternation with one named group per
+# concept, so topics are classified with one scan in the common case
+CONCEPT_REGEX = re.compile("|".join(
+    f"(?P<{concept}>{pattern.pattern})" for pattern, concept in CONCEPT_PATTERNS
+))
+CONCEPT_PRIORITY = {concept: i for i, (_, concept) in enumerate(CONCEPT_PATTERNS)}
+
+def _iter_topic_documents(knowledge_base_dir, json_files):
+    """
+    Build the document text for every topic in the knowledge base files.
     
-    for json_file in json_files:
+    Yields:
+        Tuples of (file name, class level, topic name, document text)
+    """
+    for json_file in tqdm(json_files, desc="Loading JSON", disable=not SHOW_PROGRESS):
         file_path = knowledge_base_dir / json_file
         
         if not file_path.exists():
-            print(f"⚠️  Warning: {json_file} not found at {file_path}, skipping...")
+            tqdm.write(f"⚠️  Warning: {json_file} not found at {file_path}, skipping...")
             continue
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(file_path)
             
             class_level = data.get("class", "unknown")
             topics = data.get("topics", [])
             
-            print(f"  Loading {len(topics)} topics from {json_file}...")
+            logger.info("Loading %d topics from %s", len(topics), json_file)
             
-            for topic in topics:
+            for topic in tqdm(topics, desc=json_file, leave=False, disable=not SHOW_PROGRESS):
                 topic_name = topic.get("topic_name", "Unknown Topic")
                 definition = topic.get("definition", "")
                 key_points = topic.get("key_points", [])
@@ -53,118 +94,287 @@ def load_json_knowledge_base():
                 facts = topic.get("facts", [])
                 
                 # Create a comprehensive document text
-                doc_text = f"""
-Topic: {topic_name}
-Class Level: {class_level}
-
-Definition:
-{definition}
-
-Key Points:
-{chr(10).join('- ' + point for point in key_points)}
-
-{('Processes:' + chr(10) + chr(10).join('- ' + proc for proc in processes)) if processes else ''}
-
-{('Examples:' + chr(10) + chr(10).join('- ' + ex for ex in examples)) if examples else ''}
-
-{('Facts:' + chr(10) + chr(10).join('- ' + fact for fact in facts)) if facts else ''}
-"""
-                
-                documents.append(doc_text.strip())
+                kp = NL.join([f"- {point}" for point in key_points])
+                pr = NL.join([f"- {proc}" for proc in processes])
+                ex = NL.join([f"- {example}" for example in examples])
+                fc = NL.join([f"- {fact}" for fact in facts])
                 
-                # Determine age group and difficulty based on class level
-                age_group, difficulty = _map_class_to_age_difficulty(class_level)
+                doc_text = "\n\n".join(filter(None, [
+                    f"Topic: {topic_name}\nClass Level: {class_level}",
+                    f"Definition:\n{definition}",
+                    f"Key Points:\n{kp}",
+                    pr and f"Processes:\n{pr}",
+                    ex and f"Examples:\n{ex}",
+                    fc and f"Facts:\n{fc}",
+                ]))
                 
-                # Map topic to financial concept
-                concept = _map_topic_to_concept(topic_name)
-                
-                metadata.append({
-                    "class": class_level,
-                    "topic": topic_name,
-                    "concept": concept,
-                    "difficulty": difficulty,
-                    "age_group": age_group,
-                    "source": json_file
-                })
+                yield json_file, class_level, topic_name, doc_text
         
         except Exception as e:
-            print(f"❌ Error loading {json_file}: {str(e)}")
+            tqdm.write(f"❌ Error loading {json_file}: {str(e)}")
             continue
+
+def load_json_knowledge_base():
+    """
+    Load financial education knowledge from JSON files.
     
-    return documents, metadata
+    A topic whose document text exactly repeats an earlier one is yielded
+    once. The text includes the class level, so the same topic name taught
+    in different classes stays separate.
+    
+    Yields:
+        Tuples of (document text, metadata dict), one per unique topic
+    """
+    
+    # Get the project root directory
+    project_root = Path(__file__).parent.parent
+    knowledge_base_dir = project_root / "data" / "knowledge_base"
+    
+    # List of JSON files to load
+    json_files = [
+        "Class_6.json",
+        "Class_7.json",
+        "Class_8.json",
+        "Class_9.json",
+        "Class_10.json"
+    ]
+    
+    print("Loading knowledge from JSON files...")
+    
+    # Content hashes of the documents yielded so far
+    seen = set()
+    
+    for json_file, class_level, topic_name, doc_text in _iter_topic_documents(knowledge_base_dir, json_files):
+        doc_hash = hashlib.blake2b(doc_text.encode('utf-8'), digest_size=16).digest()
+        if doc_hash in seen:
+            continue
+        seen.add(doc_hash)
+        
+        # Determine age group and difficulty based on class level
+        age_group, difficulty = _map_class_to_age_difficulty(class_level)
+        
+        # Map topic to financial concept
+        concept = _map_topic_to_concept(topic_name)
+        
+        meta = {
+            "class": class_level,
+            "topic": topic_name,
+            "concept": concept,
+            "difficulty": difficulty,
+            "age_group": age_group,
+            "source": json_file
+        }
+        
+        yield doc_text, meta
 
+@lru_cache(maxsize=None)
 def _map_class_to_age_difficulty(class_level):
     """Map class level to age group and difficulty."""
     try:
         class_num = int(class_level)
         
         if class_num <= 7:
-            return "6-9", "beginner"
+            return BEGINNER
         elif class_num <= 9:
-            return "10-12", "intermediate"
+            return INTERMEDIATE
         else:
-            return "13-17", "advanced"
+            return ADVANCED
     except:
-        return "10-12", "intermediate"  # default
+        return INTERMEDIATE  # default
 
+@lru_cache(maxsize=4096)
 def _map_topic_to_concept(topic_name):
     """Map topic name to financial concept."""
     topic_lower = topic_name.lower()
     
-    # Mapping patterns
-    if any(word in topic_lower for word in ["saving", "save", "savings"]):
-        return "saving"
-    elif any(word in topic_lower for word in ["budget", "expense", "planning"]):
-        return "budgeting"
-    elif any(word in topic_lower for word in ["need", "want", "essential"]):
-        return "needs_vs_wants"
-    elif any(word in topic_lower for word in ["earn", "income", "salary", "wage"]):
-        return "earning"
-    elif any(word in topic_lower for word in ["interest", "compound", "growth"]):
-        return "compound_interest"
-    elif any(word in topic_lower for word in ["risk", "reward", "investment", "stock"]):
-        return "risk_reward"
-    elif any(word in topic_lower for word in ["barter", "money", "currency", "trade"]):
-        return "money_basics"
-    elif any(word in topic_lower for word in ["borrow", "loan", "credit", "debt"]):
-        return "borrowing"
-    elif any(word in topic_lower for word in ["bank", "rbi", "financial"]):
-        return "banking"
-    elif any(word in topic_lower for word in ["tax", "gst"]):
-        return "taxation"
-    else:
+    match = CONCEPT_REGEX.search(topic_lower)
+    if not match:
         return "general_finance"
+    
+    # The leftmost keyword is not necessarily the highest-priority one, so
+    # only the concepts ranked above it still need checking
+    for pattern, concept in CONCEPT_PATTERNS[:CONCEPT_PRIORITY[match.lastgroup]]:
+        if pattern.search(topic_lower):
+            return concept
+    return match.lastgroup
 
-def load_knowledge_base():
-    """Load financial education knowledge into vector store."""
+def _ingested_keys(rag_service):
+    """
+    (source, topic) keys of the knowledge-base documents already in the store.
     
-    rag_service = RAGService()
+    Read from the loaded metadata rather than a separate file, so the keys
+    cannot disagree with the index: an empty or rebuilt index has none.
+    """
+    return frozenset(
+        (meta["source"], meta["topic"])
+        for meta in rag_service.metadata
+        if "source" in meta and "topic" in meta
+    )
+
+async def _add_batch(rag_service, batch_docs, batch_metadata):
+    """Embed one batch of documents."""
+    await rag_service.add_documents(batch_docs, batch_metadata, save=False)
+
+def _produce_batches(doc_stream, already_ingested, batch_size, batch_queue, stats, stop):
+    """
+    Parse documents and group them into batches on a background thread.
+    
+    Runs while the main thread embeds the previous batch. Puts None on the
+    queue when the stream is exhausted, fails, or stop is set.
+    """
+    try:
+        batch_docs, batch_metadata = [], []
+        
+        for doc_text, meta in doc_stream:
+            if stop.is_set():
+                return
+            
+            class_level = meta.get("class", "unknown")
+            stats["class_counts"][class_level] = stats["class_counts"].get(class_level, 0) + 1
+            
+            if (meta["source"], meta["topic"]) in already_ingested:
+                stats["skipped"] += 1
+                continue
+            
+            batch_docs.append(doc_text)
+            batch_metadata.append(meta)
+            if len(batch_docs) == batch_size:
+                batch_queue.put((batch_docs, batch_metadata))
+                batch_docs, batch_metadata = [], []
+        
+        if batch_docs:
+            batch_queue.put((batch_docs, batch_metadata))
+    finally:
+        batch_queue.put(None)
+
+async def _ingest_documents(rag_service, doc_stream, checkpoint_every, batch_size):
+    """
+    Stream documents into the vector store in small batches.
     
-    # Load documents and metadata from JSON files
-    documents, metadata = load_json_knowledge_base()
+    Indexes that need training receive their first TRAIN_SAMPLE_SIZE
+    documents (or the whole stream, if shorter) as one batch so they are
+    trained on a representative sample rather than the first small batch.
     
-    if not documents:
-        print("❌ No documents loaded! Please check your JSON files.")
-        return
+    A producer thread parses JSON and assembles batches while this coroutine
+    embeds them; the bounded queue keeps at most PIPELINE_DEPTH batches of
+    document text in memory. The index is checkpointed every
+    checkpoint_every documents and once more at the end; topics whose
+    (source, topic) key is already in the saved metadata are skipped.
     
-    print(f"\n📚 Total documents prepared: {len(documents)}")
+    Returns:
+        Tuple of (documents added, documents skipped, topic counts by class)
+    """
+    batch_queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop = threading.Event()
+    stats = {"skipped": 0, "class_counts": {}}
+    added = since_checkpoint = 0
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        producer = executor.submit(
+            _produce_batches, doc_stream, _ingested_keys(rag_service),
+            batch_size, batch_queue, stats, stop
+        )
+        
+        pending_docs, pending_metadata = [], []
+        try:
+            while True:
+                batch = await asyncio.to_thread(batch_queue.get)
+                if batch is None:
+                    break
+                
+                batch_docs, batch_metadata = batch
+                
+                # IVF, PQ and SQ indexes are trained on the first add, so hold
+                # batches back until there is a full training sample
+                if rag_service.needs_training:
+                    pending_docs += batch_docs
+                    pending_metadata += batch_metadata
+                    if len(pending_docs) < TRAIN_SAMPLE_SIZE:
+                        continue
+                    batch_docs, batch_metadata = pending_docs, pending_metadata
+                    pending_docs, pending_metadata = [], []
+                
+                await _add_batch(rag_service, batch_docs, batch_metadata)
+                added += len(batch_docs)
+                since_checkpoint += len(batch_docs)
+                
+                if since_checkpoint >= checkpoint_every:
+                    rag_service.save_index()
+                    since_checkpoint = 0
+                    print(f"  Checkpoint: {added} documents ingested")
+            
+            # The whole stream was smaller than a training sample
+            if pending_docs:
+                await _add_batch(rag_service, pending_docs, pending_metadata)
+                added += len(pending_docs)
+        finally:
+            # If embedding failed or was cancelled part-way, stop the producer
+            # and drain the queue until it exits so it is not left blocked on
+            # a full queue. A get() abandoned by cancellation may still be
+            # waiting in a worker thread, so wake it with a final sentinel.
+            stop.set()
+            while not producer.done():
+                try:
+                    batch_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            try:
+                batch_queue.put_nowait(None)
+            except queue.Full:
+                pass  # Any waiting get() has an item to take
+        
+        # Re-raise any error from the producer thread
+        producer.result()
+    
+    if rag_service.has_unsaved_changes:
+        print("Saving index to disk...")
+        rag_service.save_index()
+    
+    if stats["skipped"]:
+        print(f"⏭️  Skipped {stats['skipped']} documents already in the vector store")
+    
+    return added, stats["skipped"], stats["class_counts"]
+
+def load_knowledge_base(checkpoint_every=CHECKPOINT_EVERY, index_type=None,
+                        batch_size=STREAM_BATCH_SIZE):
+    """
+    Load financial education knowledge into vector store.
+    
+    Args:
+        checkpoint_every: Number of documents embedded between index checkpoints
+        index_type: FAISS index type for a new index ("flat", "hnsw", "ivf",
+            "ivfpq", "sq_fp16" or "sq8"); defaults to the vector_store.index_type
+            config setting
+        batch_size: Number of documents embedded per add_documents call
+    """
+    
+    rag_service = RAGService(index_type=index_type)
+    
+    # Leave CPU headroom for the parsing thread when encoding on CPU
+    if rag_service.embedding_model.device.type == "cpu":
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+    
+    # Stream documents and metadata from JSON files into the vector store
     print("\nAdding documents to vector store...")
-    rag_service.add_documents(documents, metadata)
+    added, skipped, class_counts = asyncio.run(_ingest_documents(
+        rag_service, load_json_knowledge_base(), checkpoint_every, batch_size
+    ))
     
-    print("Saving index to disk...")
-    rag_service.save_index()
+    if not added and not skipped:
+        print("❌ No documents loaded! Please check your JSON files.")
+        return
     
-    print(f"\n✅ Successfully loaded {len(documents)} documents into vector store!")
+    print(f"\n✅ Successfully loaded {added} documents into vector store!")
     
     # Print summary by class
-    class_counts = {}
-    for meta in metadata:
-        class_level = meta.get("class", "unknown")
-        class_counts[class_level] = class_counts.get(class_level, 0) + 1
-    
     print("\n📊 Summary by Class:")
     for class_level in sorted(class_counts.keys(), key=lambda x: int(x) if x.isdigit() else 0):
         print(f"  Class {class_level}: {class_counts[class_level]} topics")
 
-if __name__ == "__main__":
+def main():
+    """Command-line entry point: show progress logs, then load the knowledge base."""
+    logging.basicConfig(level=logging.INFO)
     load_knowledge_base()
+
+if __name__ == "__main__":
+    main()
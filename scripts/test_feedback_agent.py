@@ -1,9 +1,6 @@
 """Test script for the Feedback Agent."""
 
-import sys
 import asyncio
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 
 from agents.feedback_agent import FeedbackAgent
 from services.rag_service import RAGService
@@ -26,46 +23,66 @@ async def test_feedback_agent():
     print("✅ Feedback Agent initialized successfully!")
     print()
 
-    # Test Case 1: Feedback with no bias
-    print("📝 Test Case 1: Collecting feedback with no bias concerns")
-    print("-" * 80)
+    # Collect all three test cases concurrently; bias analysis for each is an
+    # independent LLM call
+    print("📝 Collecting feedback for 3 test cases concurrently...")
+    print()
 
-    feedback1 = await feedback_agent.collect_feedback(
-        quiz_id="test_quiz_001",
-        user_id="test_user_001",
-        concept="saving_money",
-        rating=5,
-        comments="Great quiz! The story was relatable and fun.",
-        difficulty_perception="just_right",
-        relevance_score=5
+    feedback1, feedback2, feedback3 = await asyncio.gather(
+        # Test Case 1: Feedback with no bias
+        feedback_agent.collect_feedback(
+            quiz_id="test_quiz_001",
+            user_id="test_user_001",
+            concept="saving_money",
+            rating=5,
+            comments="Great quiz! The story was relatable and fun.",
+            difficulty_perception="just_right",
+            relevance_score=5
+        ),
+        # Test Case 2: Feedback with potential gender bias
+        feedback_agent.collect_feedback(
+            quiz_id="test_quiz_002",
+            user_id="test_user_002",
+            concept="budgeting",
+            rating=2,
+            comments="The story only showed boys managing money. My daughter felt left out. All the examples were about sons and fathers, not daughters or mothers.",
+            difficulty_perception="just_right",
+            relevance_score=2
+        ),
+        # Test Case 3: Feedback with cultural bias
+        feedback_agent.collect_feedback(
+            quiz_id="test_quiz_003",
+            user_id="test_user_003",
+            concept="investing",
+            rating=3,
+            comments="The story assumed everyone celebrates Christmas and has traditional American family structures. Not inclusive of diverse cultures and family types.",
+            difficulty_perception="too_hard",
+            relevance_score=2
+        )
     )
 
+    # Process all feedback concurrently
+    result1, result2, result3 = await asyncio.gather(
+        *(feedback_agent.process_feedback(f) for f in (feedback1, feedback2, feedback3))
+    )
+
+    # Report results in order
+    print("📝 Test Case 1: Collecting feedback with no bias concerns")
+    print("-" * 80)
+
     print(f"✅ Feedback collected: {feedback1.feedback_id}")
     print(f"   Rating: {feedback1.rating}/5")
     print(f"   Has Bias: {feedback1.bias_analysis.has_bias if feedback1.bias_analysis else 'Not analyzed'}")
     print()
 
-    # Process feedback
-    result1 = await feedback_agent.process_feedback(feedback1)
     print(f"📊 Processing result:")
     print(f"   Actions taken: {result1['actions_taken']}")
     print(f"   Requires review: {result1['requires_human_review']}")
     print()
 
-    # Test Case 2: Feedback with potential gender bias
     print("📝 Test Case 2: Collecting feedback with potential gender bias")
     print("-" * 80)
 
-    feedback2 = await feedback_agent.collect_feedback(
-        quiz_id="test_quiz_002",
-        user_id="test_user_002",
-        concept="budgeting",
-        rating=2,
-        comments="The story only showed boys managing money. My daughter felt left out. All the examples were about sons and fathers, not daughters or mothers.",
-        difficulty_perception="just_right",
-        relevance_score=2
-    )
-
     print(f"✅ Feedback collected: {feedback2.feedback_id}")
     print(f"   Rating: {feedback2.rating}/5")
 
@@ -83,27 +100,14 @@ async def test_feedback_agent():
                 print(f"         - {issue}")
     print()
 
-    # Process feedback
-    result2 = await feedback_agent.process_feedback(feedback2)
     print(f"📊 Processing result:")
     print(f"   Actions taken: {result2['actions_taken']}")
     print(f"   Requires review: {result2['requires_human_review']}")
     print()
 
-    # Test Case 3: Feedback with cultural bias
     print("📝 Test Case 3: Collecting feedback with cultural concerns")
     print("-" * 80)
 
-    feedback3 = await feedback_agent.collect_feedback(
-        quiz_id="test_quiz_003",
-        user_id="test_user_003",
-        concept="investing",
-        rating=3,
-        comments="The story assumed everyone celebrates Christmas and has traditional American family structures. Not inclusive of diverse cultures and family types.",
-        difficulty_perception="too_hard",
-        relevance_score=2
-    )
-
     print(f"✅ Feedback collected: {feedback3.feedback_id}")
     print(f"   Rating: {feedback3.rating}/5")
 
@@ -120,8 +124,6 @@ async def test_feedback_agent():
                 print(f"         - {rec}")
     print()
 
-    # Process feedback
-    result3 = await feedback_agent.process_feedback(feedback3)
     print(f"📊 Processing result:")
     print(f"   Actions taken: {result3['actions_taken']}")
     print()
@@ -4,6 +4,8 @@ Verify installation and setup of Financial Education Quiz Engine.
 """
 import sys
 import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Colors for terminal output
@@ -45,12 +47,16 @@ def check_dependencies():
         "pandas"
     ]
     
+    # find_spec locates each package without executing its import-time code;
+    # the lookups mostly wait on the filesystem, so run them side by side
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        specs = list(executor.map(importlib.util.find_spec, required_packages))
+    
     all_installed = True
-    for package in required_packages:
-        try:
-            __import__(package)
+    for package, spec in zip(required_packages, specs):
+        if spec is not None:
             print(f"  {GREEN}✓{RESET} {package}")
-        except ImportError:
+        else:
             print(f"  {RED}✗{RESET} {package} (not installed)")
             all_installed = False
     
@@ -125,6 +131,18 @@ def check_knowledge_base():
 
 def main():
     """Run all verification checks."""
+    # Block-buffer stdout so the many short lines below go out in a few large
+    # writes instead of one flush per line on a TTY
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
+    
+    try:
+        return _run_checks()
+    finally:
+        sys.stdout.flush()
+
+def _run_checks():
+    """Run each check and print the summary."""
     print_header("Financial Education Quiz Engine - Installation Check")
     
     checks = [
@@ -4,29 +4,49 @@ Script to verify if knowledge base was updated after admin reviews.
 Checks vector store modification times against admin review timestamps.
 """
 
-import json
+import heapq
 from pathlib import Path
 from datetime import datetime
 import os
 
+import numpy as np
+
+from utils.json_utils import read_json
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; the history is then loaded whole
+    ijson = None
+
+def _iter_json_array(file_path):
+    """Yield the items of a top-level JSON array, stream-decoding with ijson when available."""
+    if ijson is None:
+        yield from read_json(file_path)
+        return
+    with open(file_path, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
 def check_kb_updates():
     print("=" * 80)
     print("KNOWLEDGE BASE UPDATE VERIFICATION")
     print("=" * 80)
     print()
 
-    # Check vector store files
+    # Check vector store files; one directory scan gives every entry's stat
     vector_store_path = Path("data/vector_store")
-    index_file = vector_store_path / "education.index"
-    metadata_file = vector_store_path / "metadata.pkl"
+    try:
+        with os.scandir(vector_store_path) as it:
+            entries = {entry.name: entry for entry in it}
+    except FileNotFoundError:
+        entries = {}
 
     print("📁 Vector Store Files:")
     print("-" * 80)
 
-    if index_file.exists():
-        index_mtime = os.path.getmtime(index_file)
-        index_time = datetime.fromtimestamp(index_mtime)
-        index_size = index_file.stat().st_size
+    if "education.index" in entries:
+        index_stat = entries["education.index"].stat()
+        index_time = datetime.fromtimestamp(index_stat.st_mtime)
+        index_size = index_stat.st_size
         print(f"✅ education.index:")
         print(f"   Last Modified: {index_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"   Size: {index_size:,} bytes")
@@ -34,17 +54,26 @@ def check_kb_updates():
         print("❌ education.index: NOT FOUND")
         return
 
-    if metadata_file.exists():
-        meta_mtime = os.path.getmtime(metadata_file)
-        meta_time = datetime.fromtimestamp(meta_mtime)
-        meta_size = metadata_file.stat().st_size
-        print(f"✅ metadata.pkl:")
+    if "metadata.json" in entries:
+        meta_stat = entries["metadata.json"].stat()
+        meta_time = datetime.fromtimestamp(meta_stat.st_mtime)
+        meta_size = meta_stat.st_size
+        print(f"✅ metadata.json:")
         print(f"   Last Modified: {meta_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"   Size: {meta_size:,} bytes")
     else:
-        print("❌ metadata.pkl: NOT FOUND")
+        print("❌ metadata.json: NOT FOUND")
         return
 
+    # Admin updates are appended to the write-ahead log until it is compacted
+    if "wal.bin" in entries:
+        wal_stat = entries["wal.bin"].stat()
+        wal_time = datetime.fromtimestamp(wal_stat.st_mtime)
+        print(f"✅ wal.bin (updates not yet compacted):")
+        print(f"   Last Modified: {wal_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"   Size: {wal_stat.st_size:,} bytes")
+        index_time = max(index_time, wal_time)
+
     print()
     print("=" * 80)
 
@@ -55,39 +84,42 @@ def check_kb_updates():
         print("❌ Admin review history not found")
         return
 
-    with open(history_file, 'r') as f:
-        history = json.load(f)
-
-    # Find reviews that should have updated KB
-    kb_updates = []
-    for review in history:
+    # Find reviews that should have updated KB, keeping only those in memory
+    kb_reviews = []
+    for review in _iter_json_array(history_file):
         actions = review.get('actions_taken', [])
         if 'knowledge_base_updated_by_admin' in actions or 'forced_content_update' in actions:
-            reviewed_at = review.get('reviewed_at')
-            if reviewed_at:
-                review_time = datetime.fromisoformat(reviewed_at)
-                kb_updates.append({
-                    'review_id': review.get('review_id'),
-                    'time': review_time,
-                    'concept': review.get('feedback', {}).get('concept'),
-                    'decision': review.get('admin_decision'),
-                    'bias_types': review.get('admin_review', {}).get('bias_override', {}).get('bias_types', []),
-                    'actions': actions
-                })
-
-    print(f"📊 Admin Reviews with KB Updates: {len(kb_updates)}")
+            if review.get('reviewed_at'):
+                kb_reviews.append(review)
+
+    print(f"📊 Admin Reviews with KB Updates: {len(kb_reviews)}")
     print("-" * 80)
 
-    if not kb_updates:
+    if not kb_reviews:
         print("⚠️  No KB update reviews found")
         return
 
-    # Show recent KB updates
-    kb_updates.sort(key=lambda x: x['time'], reverse=True)
+    # Parse all timestamps in one vectorized call and only build entries for
+    # the five most recent reviews (nlargest is stable, so ties keep history order)
+    review_times = np.array([review['reviewed_at'] for review in kb_reviews], dtype='datetime64[us]')
+    review_ticks = review_times.view(np.int64).tolist()
+    recent_order = heapq.nlargest(5, range(len(kb_reviews)), key=review_ticks.__getitem__)
+
+    kb_updates = []
+    for i in recent_order:
+        review = kb_reviews[i]
+        kb_updates.append({
+            'review_id': review.get('review_id'),
+            'time': review_times[i].item(),
+            'concept': review.get('feedback', {}).get('concept'),
+            'decision': review.get('admin_decision'),
+            'bias_types': review.get('admin_review', {}).get('bias_override', {}).get('bias_types', []),
+            'actions': review.get('actions_taken', [])
+        })
 
     print("\n📝 Recent KB Updates (last 5):")
     print("-" * 80)
-    for i, update in enumerate(kb_updates[:5], 1):
+    for i, update in enumerate(kb_updates, 1):
         print(f"\n{i}. Review ID: {update['review_id']}")
         print(f"   Time: {update['time'].strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"   Concept: {update['concept']}")
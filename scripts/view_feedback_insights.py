@@ -1,28 +1,282 @@
 """Script to view aggregated feedback insights and bias analysis."""
 
-import sys
-import json
+import heapq
+import os
+import sqlite3
+from collections import Counter
 from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 
 from models import QuizFeedback, BiasAnalysis
 from utils.feedback_processor import FeedbackProcessor
+from utils.json_utils import dump_json, load_json, read_json
 from datetime import datetime
 
+try:
+    import ijson
+except ImportError:  # ijson is optional; large files are then loaded whole
+    ijson = None
+
+# Below this many entries building a DataFrame costs more than it saves
+PANDAS_MIN_ROWS = 10_000
+
+# Feedback files at least this large are stream-decoded one entry at a time
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+
+def _iter_json_lines(file_path):
+    """Yield the objects of a JSON Lines file one line at a time."""
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield load_json(line)
+            except ValueError:
+                continue  # Partial last line left by an interrupted append
+
+def _write_json(file_path, obj):
+    """Write JSON atomically so readers never see a partial file."""
+    data = dump_json(obj)
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+
+def _comment_summary(f):
+    """Fields of a commented feedback entry shown in the report."""
+    bias = f.get('bias_analysis')
+    return {
+        'rating': f.get('rating', 0),
+        'comments': f.get('comments', ''),
+        'concept': f.get('concept', 'unknown'),
+        'created_at': f.get('created_at', ''),
+        'bias_types': bias.get('bias_types', []) if bias and bias.get('has_bias') else None
+    }
+
+def _aggregate_feedback(feedback_data):
+    """
+    Compute the dashboard aggregates for feedback entries.
+
+    Accepts a list or any iterable of entries; iterables are consumed in a
+    single pass without holding the entries themselves.
+    """
+    if isinstance(feedback_data, list) and len(feedback_data) >= PANDAS_MIN_ROWS:
+        return _aggregate_feedback_pandas(feedback_data)
+
+    total_feedbacks = 0
+    rating_sum = 0
+    rating_counts = Counter()
+    perception_counts = Counter()
+    bias_detected_count = 0
+    severity_counts = Counter()
+    bias_types_count = Counter()
+    concepts_totals = {}
+    recent_heap = []
+
+    # One pass over the entries updates running counters, so memory stays
+    # bounded by the number of distinct values rather than entries
+    for f in feedback_data:
+        total_feedbacks += 1
+        rating = f.get('rating', 0)
+        rating_sum += rating
+        rating_counts[rating] += 1
+        perception_counts[f.get('difficulty_perception')] += 1
+
+        bias = f.get('bias_analysis')
+        if bias and bias.get('has_bias'):
+            bias_detected_count += 1
+            severity_counts[bias.get('severity', 'low')] += 1
+            bias_types_count.update(bias.get('bias_types', []))
+
+        totals = concepts_totals.setdefault(str(f.get('concept', 'unknown')), [0, 0])
+        totals[0] += rating
+        totals[1] += 1
+
+        # Keep only the five newest commented entries; -total_feedbacks
+        # breaks timestamp ties in favour of the earlier entry
+        if f.get('comments') and f.get('created_at'):
+            item = (f.get('created_at', ''), -total_feedbacks, f)
+            if len(recent_heap) < 5:
+                heapq.heappush(recent_heap, item)
+            elif item[:2] > recent_heap[0][:2]:
+                heapq.heapreplace(recent_heap, item)
+
+    avg_rating = rating_sum / total_feedbacks if total_feedbacks else 0
+
+    rating_dist = {r: rating_counts[r] for r in (1, 2, 3, 4, 5)}
+    bias_by_severity = {severity: severity_counts[severity] for severity in ("low", "medium", "high")}
+    difficulty_perception = {
+        perception: perception_counts[perception]
+        for perception in ("too_easy", "just_right", "too_hard")
+    }
+
+    recent_with_comments = [item[2] for item in sorted(recent_heap, key=lambda item: item[:2], reverse=True)]
+
+    # Keys are kept as strings so the aggregates round-trip through JSON
+    return {
+        'total_feedbacks': total_feedbacks,
+        'avg_rating': avg_rating,
+        'rating_dist': {str(r): c for r, c in rating_dist.items()},
+        'bias_detected_count': bias_detected_count,
+        'bias_by_severity': bias_by_severity,
+        'bias_types_count': dict(bias_types_count),
+        'difficulty_perception': difficulty_perception,
+        'concepts': {
+            concept: [rating_sum / count, count]
+            for concept, (rating_sum, count) in concepts_totals.items()
+        },
+        'recent_comments': [_comment_summary(f) for f in recent_with_comments]
+    }
+
+def _aggregate_feedback_pandas(feedback_data):
+    """Vectorized equivalent of _aggregate_feedback for large feedback files."""
+    import pandas as pd
+
+    df = pd.DataFrame(feedback_data)
+
+    def column(name, default):
+        return df[name] if name in df else pd.Series(default, index=df.index)
+
+    ratings = column('rating', 0).fillna(0)
+    rating_counts = ratings.value_counts()
+
+    # Bias analysis
+    bias_df = pd.json_normalize(column('bias_analysis', None).dropna().tolist())
+    if 'has_bias' in bias_df:
+        flagged = bias_df[bias_df['has_bias'].fillna(False).astype(bool)]
+    else:
+        flagged = bias_df.iloc[0:0]
+    severity_counts = (
+        flagged['severity'].fillna('low') if 'severity' in flagged
+        else pd.Series('low', index=flagged.index)
+    ).value_counts()
+    bias_types = (
+        flagged['bias_types'].explode().dropna() if 'bias_types' in flagged
+        else pd.Series(dtype=object)
+    )
+
+    # Difficulty perception
+    perception_counts = column('difficulty_perception', None).value_counts()
+
+    # Concepts feedback
+    concept_stats = (
+        pd.DataFrame({'concept': column('concept', 'unknown').fillna('unknown').astype(str), 'rating': ratings})
+        .groupby('concept')['rating']
+        .agg(['mean', 'count'])
+    )
+
+    # Recent feedback with comments
+    comments = column('comments', '').fillna('').astype(bool)
+    created_at = column('created_at', '').fillna('')
+    recent = created_at[comments & created_at.astype(bool)].sort_values(ascending=False, kind='stable')
+
+    return {
+        'total_feedbacks': len(df),
+        'avg_rating': float(ratings.mean()),
+        'rating_dist': {str(r): int(rating_counts.get(r, 0)) for r in range(1, 6)},
+        'bias_detected_count': len(flagged),
+        'bias_by_severity': {
+            severity: int(severity_counts.get(severity, 0))
+            for severity in ("low", "medium", "high")
+        },
+        'bias_types_count': {
+            bias_type: int(count)
+            for bias_type, count in bias_types.value_counts(sort=False).items()
+        },
+        'difficulty_perception': {
+            perception: int(perception_counts.get(perception, 0))
+            for perception in ("too_easy", "just_right", "too_hard")
+        },
+        'concepts': {
+            concept: [float(row['mean']), int(row['count'])]
+            for concept, row in concept_stats.iterrows()
+        },
+        'recent_comments': [_comment_summary(feedback_data[i]) for i in recent.index[:5]]
+    }
+
+def _cached_aggregates(cache_file, key, compute):
+    """Return the cached aggregates if they were stored under key, else compute and cache them."""
+    if cache_file.exists():
+        try:
+            cached = read_json(cache_file)
+            if cached.get('key') == key:
+                return cached['aggregates']
+        except (ValueError, KeyError, AttributeError, OSError):
+            pass  # Unreadable cache; recompute below
+
+    aggregates = compute()
+
+    try:
+        _write_json(cache_file, {'key': key, 'aggregates': aggregates})
+    except OSError as e:
+        print(f"⚠️  Could not write insights cache: {e}")
+
+    return aggregates
+
+def _load_aggregates(feedback_file):
+    """
+    Return aggregates for the feedback file, reusing the on-disk cache when the
+    file's mtime and size are unchanged since it was written.
+    """
+    stat = feedback_file.stat()
+
+    def compute():
+        if feedback_file.suffix == '.jsonl':
+            return _aggregate_feedback(_iter_json_lines(feedback_file))
+        if ijson is not None and stat.st_size >= STREAM_MIN_BYTES:
+            with open(feedback_file, 'rb') as f:
+                return _aggregate_feedback(ijson.items(f, 'item', use_float=True))
+        return _aggregate_feedback(read_json(feedback_file))
+
+    cache_file = feedback_file.parent / ".feedback_insights_cache.json"
+    return _cached_aggregates(cache_file, [stat.st_mtime_ns, stat.st_size], compute)
+
+def _load_db_aggregates(db_file):
+    """
+    Return aggregates for the feedback table, or None if the database has none.
+
+    Feedback rows are only ever appended, so the row count and highest id
+    identify the table's contents for the cache.
+    """
+    try:
+        conn = sqlite3.connect(f"{db_file.as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+
+    try:
+        count, last_id = conn.execute("SELECT COUNT(*), MAX(id) FROM feedback").fetchone()
+
+        def compute():
+            rows = conn.execute("SELECT payload FROM feedback ORDER BY id")
+            return _aggregate_feedback(load_json(payload) for (payload,) in rows)
+
+        cache_file = db_file.parent / ".feedback_insights_cache.json"
+        return _cached_aggregates(cache_file, ['feedback', count, last_id], compute)
+    except sqlite3.Error:
+        return None  # No feedback table yet
+    finally:
+        conn.close()
+
 def display_feedback_insights():
     """Display aggregated feedback insights."""
 
-    feedback_file = Path(__file__).parent.parent / "data" / "feedback.json"
+    data_dir = Path(__file__).parent.parent / "data"
 
-    if not feedback_file.exists():
+    # Feedback lives in the database; the files are only read until the app
+    # has imported them
+    for feedback_file in (data_dir / "feedback.jsonl", data_dir / "feedback.json"):
+        if feedback_file.exists():
+            aggregates = _load_aggregates(feedback_file)
+            break
+    else:
+        db_file = data_dir / "quiz_data.db"
+        aggregates = _load_db_aggregates(db_file) if db_file.exists() else None
+
+    if aggregates is None:
         print("📭 No feedback data available yet.")
         return
+    total_feedbacks = aggregates['total_feedbacks']
 
-    # Load feedback data
-    with open(feedback_file, 'r') as f:
-        feedback_data = json.load(f)
-
-    if not feedback_data:
+    if not total_feedbacks:
         print("📭 No feedback entries found.")
         return
 
@@ -32,67 +286,39 @@ def display_feedback_insights():
     print()
 
     # Overall statistics
-    total_feedbacks = len(feedback_data)
-    ratings = [f.get('rating', 0) for f in feedback_data]
-    avg_rating = sum(ratings) / len(ratings) if ratings else 0
-
     print(f"📈 Overall Statistics:")
     print(f"   Total Feedbacks: {total_feedbacks}")
-    print(f"   Average Rating: {avg_rating:.2f}/5.0")
+    print(f"   Average Rating: {aggregates['avg_rating']:.2f}/5.0")
     print()
 
     # Rating distribution
-    rating_dist = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for r in ratings:
-        if r in rating_dist:
-            rating_dist[r] += 1
-
     print(f"⭐ Rating Distribution:")
-    for rating, count in sorted(rating_dist.items(), reverse=True):
+    for rating, count in sorted(aggregates['rating_dist'].items(), reverse=True):
         bar = "█" * count
         print(f"   {rating} stars: {bar} ({count})")
     print()
 
     # Bias analysis
-    bias_detected_count = 0
-    bias_by_severity = {"low": 0, "medium": 0, "high": 0}
-    bias_types_count = {}
-
-    for f in feedback_data:
-        bias = f.get('bias_analysis')
-        if bias and bias.get('has_bias'):
-            bias_detected_count += 1
-            severity = bias.get('severity', 'low')
-            if severity in bias_by_severity:
-                bias_by_severity[severity] += 1
-
-            for bias_type in bias.get('bias_types', []):
-                bias_types_count[bias_type] = bias_types_count.get(bias_type, 0) + 1
+    bias_detected_count = aggregates['bias_detected_count']
 
     print(f"⚠️  Bias Detection:")
     print(f"   Bias Detected: {bias_detected_count}/{total_feedbacks} ({(bias_detected_count/total_feedbacks)*100:.1f}%)")
 
     if bias_detected_count > 0:
         print(f"   By Severity:")
-        for severity, count in bias_by_severity.items():
+        for severity, count in aggregates['bias_by_severity'].items():
             if count > 0:
                 print(f"      {severity.capitalize()}: {count}")
 
-        if bias_types_count:
+        if aggregates['bias_types_count']:
             print(f"   By Type:")
-            for bias_type, count in sorted(bias_types_count.items(), key=lambda x: x[1], reverse=True):
+            for bias_type, count in sorted(aggregates['bias_types_count'].items(), key=lambda x: x[1], reverse=True):
                 print(f"      {bias_type}: {count}")
     print()
 
     # Difficulty perception
-    difficulty_perception = {"too_easy": 0, "just_right": 0, "too_hard": 0}
-    for f in feedback_data:
-        perception = f.get('difficulty_perception')
-        if perception in difficulty_perception:
-            difficulty_perception[perception] += 1
-
     print(f"📊 Difficulty Perception:")
-    for perception, count in difficulty_perception.items():
+    for perception, count in aggregates['difficulty_perception'].items():
         if count > 0:
             percentage = (count / total_feedbacks) * 100
             bar = "█" * int(percentage / 5)
@@ -100,44 +326,25 @@ def display_feedback_insights():
     print()
 
     # Concepts feedback
-    concepts_ratings = {}
-    for f in feedback_data:
-        concept = f.get('concept', 'unknown')
-        rating = f.get('rating', 0)
-        if concept not in concepts_ratings:
-            concepts_ratings[concept] = []
-        concepts_ratings[concept].append(rating)
-
     print(f"📚 Feedback by Concept:")
-    for concept, ratings in sorted(concepts_ratings.items()):
-        avg = sum(ratings) / len(ratings)
+    for concept, (avg, count) in sorted(aggregates['concepts'].items()):
         status = "✅" if avg >= 4.0 else "⚠️" if avg >= 3.0 else "❌"
-        print(f"   {status} {concept}: {avg:.2f}/5.0 ({len(ratings)} responses)")
+        print(f"   {status} {concept}: {avg:.2f}/5.0 ({count} responses)")
     print()
 
     # Recent feedback with comments
-    recent_with_comments = [
-        f for f in feedback_data
-        if f.get('comments') and f.get('created_at')
-    ]
-    recent_with_comments.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-
-    if recent_with_comments:
+    if aggregates['recent_comments']:
         print(f"💬 Recent Feedback Comments (Top 5):")
-        for i, f in enumerate(recent_with_comments[:5], 1):
-            rating = f.get('rating', 0)
-            comment = f.get('comments', '')
-            concept = f.get('concept', 'unknown')
-            timestamp = f.get('created_at', '')
+        for i, f in enumerate(aggregates['recent_comments'], 1):
+            comment = f['comments']
 
-            print(f"   {i}. [{concept}] ⭐{rating}/5")
+            print(f"   {i}. [{f['concept']}] ⭐{f['rating']}/5")
             print(f"      \"{comment[:100]}{'...' if len(comment) > 100 else ''}\"")
-            print(f"      Time: {timestamp}")
+            print(f"      Time: {f['created_at']}")
 
             # Show bias if detected
-            bias = f.get('bias_analysis')
-            if bias and bias.get('has_bias'):
-                print(f"      ⚠️ Bias detected: {', '.join(bias.get('bias_types', []))}")
+            if f['bias_types'] is not None:
+                print(f"      ⚠️ Bias detected: {', '.join(f['bias_types'])}")
             print()
 
     print("=" * 80)
@@ -146,4 +353,3 @@ def display_feedback_insights():
 
 if __name__ == "__main__":
     display_feedback_insights()
-
@@ -1,11 +1,13 @@
 """MCP Client for communicating with the Multi-Controller Proxy server."""
 
+import asyncio
 import logging
 import httpx
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from models import UserProfile, Transaction, QuizHistory, GamificationData
 from config import config
 from datetime import datetime
+from utils.json_utils import dump_json, load_json
 
 logger = logging.getLogger(__name__)
 
@@ -17,20 +19,53 @@ class MCPClient:
         self.base_url = base_url or config.mcp.base_url
         self.timeout = config.mcp.timeout
         self.endpoints = config.mcp.endpoints
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use.
+        
+        Pooled connections belong to the event loop that opened them, and the
+        Streamlit apps run each call on a fresh loop, so a client left over
+        from a previous loop is closed and replaced rather than reused.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                try:
+                    await self._client.aclose()
+                except Exception as e:
+                    logger.debug(f"Error closing previous HTTP client: {str(e)}")
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client.
+        
+        Call this before closing the event loop the client was used on.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
     
     async def get_user_profile(self, user_id: str) -> UserProfile:
         """Retrieve user profile from MCP."""
         logger.info(f"Fetching user profile for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}{self.endpoints['user_profile']}",
-                    params={"user_id": user_id}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return UserProfile(**data)
+            client = await self._get_client()
+            response = await client.get(
+                f"{self.base_url}{self.endpoints['user_profile']}",
+                params={"user_id": user_id}
+            )
+            response.raise_for_status()
+            data = load_json(response.content)
+            return UserProfile(**data)
         except Exception as e:
             logger.error(f"Error fetching user profile: {str(e)}")
             # Return default profile on error
@@ -51,14 +86,14 @@ class MCPClient:
         logger.info(f"Fetching transactions for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}{self.endpoints['transactions']}",
-                    params={"user_id": user_id, "limit": limit}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return [Transaction(**txn) for txn in data.get("transactions", [])]
+            client = await self._get_client()
+            response = await client.get(
+                f"{self.base_url}{self.endpoints['transactions']}",
+                params={"user_id": user_id, "limit": limit}
+            )
+            response.raise_for_status()
+            data = load_json(response.content)
+            return [Transaction(**txn) for txn in data.get("transactions", [])]
         except Exception as e:
             logger.error(f"Error fetching transactions: {str(e)}")
             return []
@@ -68,14 +103,14 @@ class MCPClient:
         logger.info(f"Fetching quiz history for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}{self.endpoints['quiz_history']}",
-                    params={"user_id": user_id}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return [QuizHistory(**quiz) for quiz in data.get("history", [])]
+            client = await self._get_client()
+            response = await client.get(
+                f"{self.base_url}{self.endpoints['quiz_history']}",
+                params={"user_id": user_id}
+            )
+            response.raise_for_status()
+            data = load_json(response.content)
+            return [QuizHistory(**quiz) for quiz in data.get("history", [])]
         except Exception as e:
             logger.error(f"Error fetching quiz history: {str(e)}")
             return []
@@ -85,14 +120,14 @@ class MCPClient:
         logger.info(f"Fetching gamification data for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}{self.endpoints['gamification']}",
-                    params={"user_id": user_id}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return GamificationData(**data)
+            client = await self._get_client()
+            response = await client.get(
+                f"{self.base_url}{self.endpoints['gamification']}",
+                params={"user_id": user_id}
+            )
+            response.raise_for_status()
+            data = load_json(response.content)
+            return GamificationData(**data)
         except Exception as e:
             logger.error(f"Error fetching gamification data: {str(e)}")
             # Return default gamification data
@@ -106,6 +141,41 @@ class MCPClient:
                 perfect_scores=0
             )
     
+    async def get_user_bundle(
+        self,
+        user_id: str,
+        limit: int = 10
+    ) -> Tuple[UserProfile, List[Transaction], List[QuizHistory], GamificationData]:
+        """Retrieve profile, transactions, quiz history and gamification data in one request.
+        
+        Falls back to issuing the four individual requests concurrently when the
+        server does not provide the bundle endpoint.
+        """
+        logger.info(f"Fetching user bundle for {user_id}")
+        
+        try:
+            client = await self._get_client()
+            response = await client.get(
+                f"{self.base_url}{self.endpoints.get('user_bundle', '/api/user/bundle')}",
+                params={"user_id": user_id, "limit": limit}
+            )
+            response.raise_for_status()
+            data = load_json(response.content)
+            return (
+                UserProfile(**data["profile"]),
+                [Transaction(**txn) for txn in data.get("transactions", [])],
+                [QuizHistory(**quiz) for quiz in data.get("quiz_history", [])],
+                GamificationData(**data["gamification"])
+            )
+        except Exception as e:
+            logger.warning(f"User bundle unavailable, fetching individually: {str(e)}")
+            return tuple(await asyncio.gather(
+                self.get_user_profile(user_id),
+                self.get_recent_transactions(user_id, limit),
+                self.get_quiz_history(user_id),
+                self.get_gamification_data(user_id)
+            ))
+    
     async def update_gamification_data(
         self, 
         user_id: str, 
@@ -115,13 +185,14 @@ class MCPClient:
         logger.info(f"Updating gamification data for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}{self.endpoints['update_gamification']}",
-                    json=gamif_data.model_dump(mode='json')
-                )
-                response.raise_for_status()
-                return True
+            client = await self._get_client()
+            response = await client.post(
+                f"{self.base_url}{self.endpoints['update_gamification']}",
+                content=dump_json(gamif_data.model_dump(mode='json')),
+                headers={"content-type": "application/json"}
+            )
+            response.raise_for_status()
+            return True
         except Exception as e:
             logger.error(f"Error updating gamification data: {str(e)}")
             print(f"❌ ERROR in update_gamification_data: {str(e)}")
@@ -139,20 +210,20 @@ class MCPClient:
         logger.info(f"Saving quiz result for {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/user/quiz-history",
-                    json={
-                        "user_id": user_id,
-                        "quiz_id": quiz_id,
-                        "concept": concept,
-                        "score": score,
-                        "total_questions": total,
-                        "completed_at": datetime.now().isoformat()
-                    }
-                )
-                response.raise_for_status()
-                return True
+            client = await self._get_client()
+            response = await client.post(
+                f"{self.base_url}/api/user/quiz-history",
+                json={
+                    "user_id": user_id,
+                    "quiz_id": quiz_id,
+                    "concept": concept,
+                    "score": score,
+                    "total_questions": total,
+                    "completed_at": datetime.now().isoformat()
+                }
+            )
+            response.raise_for_status()
+            return True
         except Exception as e:
             logger.error(f"Error saving quiz result: {str(e)}")
             return False
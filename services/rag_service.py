@@ -1,56 +1,586 @@
 """RAG Service for retrieving educational knowledge from vector store."""
 
+import asyncio
 import logging
+import mmap
+import os
 import pickle
+import struct
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import numpy as np
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 from config import config
+from utils.json_utils import dump_json, load_json
 
 logger = logging.getLogger(__name__)
 
+# Batch size used when encoding texts with the embedding model
+ENCODE_BATCH_SIZE = 128
+
+# Batches at least this large are added through a GPU copy of the index when
+# FAISS is built with GPU support; smaller ones are not worth the transfer
+GPU_ADD_MIN_BATCH = 4096
+
+# Number of embeddings IVF, PQ and SQ indexes are trained on before the
+# first add; callers streaming small batches should buffer up to this many
+TRAIN_SAMPLE_SIZE = 10000
+
+# Length prefix written before each UTF-8 document in the documents file
+_DOC_LENGTH = struct.Struct('<I')
+
+# Write-ahead log record header: documents in the store before the batch,
+# batch size and embedding dimension
+_WAL_HEADER = struct.Struct('<QII')
+
+# Format version recorded in the manifest written at the end of each save
+_MANIFEST_VERSION = 1
+
+def _tmp_path(path: Path) -> Path:
+    """Path a file is written to by save_index() before it is moved into place."""
+    return path.with_name(path.name + ".tmp")
+
+def _store_paths() -> Dict[str, Path]:
+    """Paths of the files making up a saved index, keyed by their manifest name."""
+    return {
+        "index": Path(config.vector_store.index_path),
+        "documents": Path(config.vector_store.documents_path),
+        "offsets": Path(config.vector_store.offsets_path),
+        "metadata": Path(config.vector_store.metadata_path),
+    }
+
+def _file_sizes(paths: Dict[str, Path]) -> Dict[str, int]:
+    """Map each name to the size of its file, as recorded in the manifest."""
+    return {name: path.stat().st_size for name, path in paths.items()}
+
+def _matches_manifest(files: Dict[str, int], paths: Dict[str, Path]) -> bool:
+    """
+    Whether the files a manifest lists have the sizes it records.
+    
+    Manifests written before document offsets were saved do not list the
+    offsets file, so only the files a manifest names are compared.
+    """
+    listed = {name: paths[name] for name in files if name in paths}
+    return files == _file_sizes(listed)
+
+class _DocumentStore:
+    """
+    Document texts backed by a memory-mapped documents file.
+    
+    Record boundaries come from an offsets file written next to it, also
+    memory-mapped, so opening a large store does not walk every record;
+    texts are decoded on lookup. Documents added since the last save are
+    held in a pending list until write() and load() fold them into the file.
+    """
+    
+    def __init__(self):
+        self._mmap = None
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._pending: List[str] = []
+        self.path: Optional[Path] = None
+        self.offsets_path: Optional[Path] = None
+    
+    def load(self, path: Path, offsets_path: Optional[Path] = None, keep_pending: bool = False):
+        """
+        Map a documents file written by write(), dropping pending documents unless keep_pending.
+        
+        Without offsets_path, as for stores saved before offsets files were
+        written, the record boundaries are found by scanning the file.
+        """
+        self.close()
+        if not keep_pending:
+            self._pending = []
+        self.path = path
+        self.offsets_path = offsets_path
+        
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        # Record boundaries: document i is stored in [offsets[i], offsets[i+1])
+        if offsets_path is not None:
+            offsets = np.load(offsets_path, mmap_mode='r')
+            if (offsets.dtype != np.int64 or offsets.ndim != 1 or len(offsets) < 2
+                    or offsets[0] != 0 or offsets[-1] != size):
+                raise ValueError(f"{offsets_path} does not match {path}")
+            self._offsets = offsets
+            return
+        
+        offsets = [0]
+        pos = 0
+        while pos < size:
+            (length,) = _DOC_LENGTH.unpack_from(self._mmap, pos)
+            pos += _DOC_LENGTH.size + length
+            offsets.append(pos)
+        self._offsets = np.array(offsets, dtype=np.int64)
+    
+    def write(self, path: Path, offsets_path: Path):
+        """Write all documents, stored and pending, as length-prefixed UTF-8 blobs, and their offsets."""
+        pos = int(self._offsets[-1])
+        ends = []
+        with open(path, 'wb') as f:
+            if self._mmap is not None:
+                f.write(self._mmap)
+            for doc in self._pending:
+                data = doc.encode('utf-8')
+                f.write(_DOC_LENGTH.pack(len(data)))
+                f.write(data)
+                pos += _DOC_LENGTH.size + len(data)
+                ends.append(pos)
+        
+        # Written through a file object so np.save keeps the path as given
+        with open(offsets_path, 'wb') as f:
+            np.save(f, np.concatenate([self._offsets, np.array(ends, dtype=np.int64)]))
+    
+    def extend(self, documents: List[str]):
+        """Add documents that have not been written yet."""
+        self._pending.extend(documents)
+    
+    def close(self):
+        """Release the memory maps, keeping pending documents."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        # Dropping the last reference unmaps a memory-mapped offsets array
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self.path = None
+        self.offsets_path = None
+    
+    def _get_doc(self, i: int) -> str:
+        """Decode document i."""
+        stored = len(self._offsets) - 1
+        if i >= stored:
+            return self._pending[i - stored]
+        start = int(self._offsets[i]) + _DOC_LENGTH.size
+        end = int(self._offsets[i + 1])
+        return self._mmap[start:end].decode('utf-8')
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1 + len(self._pending)
+    
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("document index out of range")
+        return self._get_doc(i)
+
+def _read_blob(data: bytes, pos: int):
+    """Read one length-prefixed blob, raising struct.error if it is truncated."""
+    (length,) = _DOC_LENGTH.unpack_from(data, pos)
+    start = pos + _DOC_LENGTH.size
+    if start + length > len(data):
+        raise struct.error("truncated record")
+    return data[start:start + length], start + length
+
+def _select_device() -> str:
+    """Pick the device for the embedding model, preferring CUDA when available."""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+@lru_cache(maxsize=4)
+def _get_encoder(model_name: str, device: str) -> SentenceTransformer:
+    """Load an embedding model once per process and share it across RAGService instances."""
+    logger.info(f"Loading embedding model {model_name} on {device}")
+    model = SentenceTransformer(model_name, device=device)
+    model.eval()
+    return model
+
+def _encode_texts(model: SentenceTransformer, texts: List[str]) -> np.ndarray:
+    """Encode texts into a (len(texts), dim) array of L2-normalized float32 embeddings."""
+    embeddings = model.encode(
+        texts,
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    # The encoder already emits a contiguous float32 matrix, so this is
+    # normally a no-op; it only copies if a model returns another dtype
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+@lru_cache(maxsize=512)
+def _embed_query(model: SentenceTransformer, query: str) -> bytes:
+    """
+    Encode a single retrieval query, memoized per encoder.
+    
+    The quiz flows ask for the same few dozen concept/difficulty queries over
+    and over. The embedding is cached as raw float32 bytes so callers cannot
+    mutate a shared array.
+    """
+    return _encode_texts(model, [query]).tobytes()
+
+@lru_cache(maxsize=1)
+def _get_gpu_resources():
+    """Return shared FAISS GPU resources, or None when FAISS cannot use a GPU."""
+    if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+        return None
+    return faiss.StandardGpuResources()
+
 class RAGService:
     """Retrieval-Augmented Generation service using FAISS."""
     
-    def __init__(self):
-        """Initialize RAG service with vector store."""
-        self.embedding_model = SentenceTransformer(config.embeddings.model)
+    def __init__(self, index_type: Optional[str] = None):
+        """
+        Initialize RAG service with vector store.
+        
+        Args:
+            index_type: FAISS index type for a new index ("flat", "hnsw", "ivf",
+                "ivfpq", "sq_fp16" or "sq8").
+                Defaults to config.vector_store.index_type. An existing index
+                loaded from disk keeps its own type.
+        """
+        self.embedding_model = _get_encoder(config.embeddings.model, _select_device())
+        self.index_type = index_type or config.vector_store.index_type
         self.index = None
-        self.documents = []
+        self.documents = _DocumentStore()
         self.metadata = []
+        self._dirty = False
+        self._unlogged = False  # Added with save=False, so missing from the write-ahead log
+        self._index_mapped = False  # Index is a read-only mapping of the saved file
         
         # Try to load existing index
         self._load_index()
     
     def _load_index(self):
-        """Load FAISS index and metadata from disk."""
-        index_path = Path(config.vector_store.index_path)
-        metadata_path = Path(config.vector_store.metadata_path)
+        """Load the saved index from disk, then replay the write-ahead log on top of it."""
+        self._load_saved_index()
+        self._replay_wal()
+    
+    def _load_saved_index(self):
+        """
+        Load FAISS index, documents and metadata from disk.
         
-        if index_path.exists() and metadata_path.exists():
-            try:
+        A store that exists but cannot be loaded raises instead of being
+        replaced by an empty index, which the next save would write over the
+        old files together with the write-ahead log.
+        """
+        paths = _store_paths()
+        index_path = paths["index"]
+        metadata_path = paths["metadata"]
+        documents_path = paths["documents"]
+        offsets_path = paths["offsets"]
+        legacy_path = metadata_path.with_suffix(".pkl")
+        
+        self._finish_interrupted_save(paths)
+        
+        if not index_path.exists():
+            logger.info("No existing index found, will create new one")
+            self._initialize_empty_index()
+            return
+        
+        try:
+            if metadata_path.exists() and documents_path.exists():
+                self._check_manifest(paths)
+                self.index = self._read_saved_index(index_path)
+                self.metadata = load_json(metadata_path.read_bytes())
+                self.documents.load(documents_path, offsets_path if offsets_path.exists() else None)
+                if not len(self.metadata) == len(self.documents) == self.index.ntotal:
+                    raise ValueError("saved index, documents and metadata have different sizes")
+            elif legacy_path.exists():
+                # Pickled store from older versions; rewritten in the new
+                # format on the next save
                 self.index = faiss.read_index(str(index_path))
-                with open(metadata_path, 'rb') as f:
+                with open(legacy_path, 'rb') as f:
                     data = pickle.load(f)
-                    self.documents = data['documents']
+                    self.documents.extend(data['documents'])
                     self.metadata = data['metadata']
-                logger.info(f"Loaded index with {len(self.documents)} documents")
-            except Exception as e:
-                logger.warning(f"Could not load index: {str(e)}")
+                self._dirty = True
+                logger.info(f"Loaded legacy metadata from {legacy_path}")
+            else:
+                logger.info("No existing index found, will create new one")
                 self._initialize_empty_index()
-        else:
-            logger.info("No existing index found, will create new one")
-            self._initialize_empty_index()
+                return
+            
+            self._apply_search_params()
+            logger.info(f"Loaded index with {len(self.documents)} documents")
+        except Exception as e:
+            logger.error(
+                f"Could not load index from {index_path.parent}: {str(e)}. "
+                "Restore the files or delete them to rebuild the knowledge base."
+            )
+            raise
+    
+    def _finish_interrupted_save(self, paths: Dict[str, Path]):
+        """
+        Complete a save that stopped while moving its files into place.
+        
+        save_index() writes the manifest's temporary file only after every
+        other temporary file is complete. If it is present and matches the
+        new files, whether still temporary or already moved, the remaining
+        ones are moved into place. Otherwise nothing has been replaced yet
+        and the saved files are left as they are.
+        """
+        manifest_path = Path(config.vector_store.manifest_path)
+        manifest_tmp = _tmp_path(manifest_path)
+        if not manifest_tmp.exists():
+            return
+        
+        new_paths = {
+            name: _tmp_path(path) if _tmp_path(path).exists() else path
+            for name, path in paths.items()
+        }
+        try:
+            manifest = load_json(manifest_tmp.read_bytes())
+            complete = (
+                manifest.get("version") == _MANIFEST_VERSION
+                and _matches_manifest(manifest.get("files") or {}, new_paths)
+            )
+        except (OSError, ValueError):
+            complete = False
+        if not complete:
+            return
+        
+        logger.warning("Completing an index save that was interrupted")
+        for path in paths.values():
+            if _tmp_path(path).exists():
+                os.replace(_tmp_path(path), path)
+        os.replace(manifest_tmp, manifest_path)
+    
+    def _check_manifest(self, paths: Dict[str, Path]):
+        """
+        Raise ValueError unless the saved files are the ones the manifest describes.
+        
+        The manifest is replaced last in save_index(), so a save interrupted
+        between replacing the files, and not completed on load, leaves them
+        out of step with it. Stores saved before manifests were introduced
+        have none and are accepted.
+        """
+        manifest_path = Path(config.vector_store.manifest_path)
+        if not manifest_path.exists():
+            return
+        
+        manifest = load_json(manifest_path.read_bytes())
+        if manifest.get("version") != _MANIFEST_VERSION:
+            raise ValueError(f"unsupported index manifest version {manifest.get('version')}")
+        
+        if not _matches_manifest(manifest.get("files") or {}, paths):
+            raise ValueError("saved index files do not match the manifest, the last save was interrupted")
+    
+    def _read_saved_index(self, index_path: Path):
+        """Read the saved FAISS index, memory-mapped read-only when configured."""
+        if not config.vector_store.mmap_index:
+            return faiss.read_index(str(index_path))
+        
+        # Pages come from the OS page cache and are shared between processes
+        # that load the same file; _make_index_writable() swaps in a private
+        # copy before the first modification
+        self._index_mapped = True
+        return faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    
+    def _make_index_writable(self):
+        """Replace a read-only mapped index with a private in-memory copy."""
+        if not self._index_mapped:
+            return
+        logger.info("Loading a writable copy of the memory-mapped index")
+        self.index = faiss.read_index(config.vector_store.index_path)
+        self._apply_search_params()
+        self._index_mapped = False
+    
+    def _replay_wal(self):
+        """
+        Apply write-ahead log records that are not yet part of the saved index.
+        
+        Each record carries the document count it was appended at, so records
+        already folded in by a save that crashed before removing the log are
+        skipped. A torn record at the end of the log is cut off.
+        """
+        wal_path = Path(config.vector_store.wal_path)
+        if not wal_path.exists():
+            return
+        
+        data = wal_path.read_bytes()
+        pos = replayed = 0
+        while pos < len(data):
+            try:
+                base, count, dim = _WAL_HEADER.unpack_from(data, pos)
+                start = pos + _WAL_HEADER.size
+                end = start + count * dim * 4
+                if end > len(data):
+                    raise struct.error("truncated record")
+                embeddings = np.frombuffer(data, dtype=np.float32, count=count * dim, offset=start)
+                documents = []
+                for _ in range(count):
+                    doc, end = _read_blob(data, end)
+                    documents.append(doc.decode('utf-8'))
+                metadata, end = _read_blob(data, end)
+                metadata = load_json(metadata)
+            except (struct.error, ValueError):
+                logger.warning(f"Discarding incomplete write-ahead log record at byte {pos}")
+                os.truncate(wal_path, pos)
+                break
+            
+            pos = end
+            if base + count <= len(self.documents):
+                continue
+            if base != len(self.documents):
+                logger.warning("Write-ahead log does not match the saved index, ignoring the rest")
+                break
+            
+            embeddings = embeddings.reshape(count, dim)
+            self._train_index(embeddings)
+            self._add_embeddings(embeddings)
+            self.documents.extend(documents)
+            self.metadata.extend(metadata)
+            replayed += count
+        
+        if replayed:
+            self._dirty = True
+            logger.info(f"Replayed {replayed} documents from the write-ahead log")
+    
+    def _append_wal(self, base: int, embeddings: np.ndarray, documents: List[str], metadata: List[Dict[str, Any]]):
+        """Durably append one batch of added documents to the write-ahead log."""
+        wal_path = Path(config.vector_store.wal_path)
+        wal_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        parts = [_WAL_HEADER.pack(base, len(documents), embeddings.shape[1]), embeddings.tobytes()]
+        for blob in [doc.encode('utf-8') for doc in documents] + [dump_json(metadata)]:
+            parts.append(_DOC_LENGTH.pack(len(blob)))
+            parts.append(blob)
+        
+        with open(wal_path, 'ab') as f:
+            f.write(b''.join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if wal_path.stat().st_size >= config.vector_store.wal_compact_bytes:
+            self.compact()
+    
+    def compact(self):
+        """Fold the write-ahead log into the saved index files."""
+        logger.info("Compacting write-ahead log into the saved index")
+        self.save_index(force=True)
     
     def _initialize_empty_index(self):
         """Initialize empty FAISS index."""
-        dimension = config.embeddings.dimension
-        self.index = faiss.IndexFlatL2(dimension)
-        self.documents = []
+        self.index = self._build_index(config.embeddings.dimension)
+        self._index_mapped = False
+        self.documents.close()
+        self.documents = _DocumentStore()
         self.metadata = []
     
+    def _build_index(
+        self,
+        dimension: int,
+        nlist: Optional[int] = None,
+        pq_nbits: Optional[int] = None
+    ):
+        """Build an empty FAISS index of the configured type."""
+        settings = config.vector_store
+        
+        # Embeddings are L2-normalized, so inner product equals cosine similarity
+        metric = faiss.METRIC_INNER_PRODUCT
+        
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dimension, settings.hnsw_m, metric)
+            index.hnsw.efConstruction = settings.hnsw_ef_construction
+            index.hnsw.efSearch = settings.hnsw_ef_search
+            return index
+        
+        if self.index_type == "ivf":
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist or settings.ivf_nlist, metric)
+            index.nprobe = settings.ivf_nprobe
+            return index
+        
+        if self.index_type == "ivfpq":
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist or settings.ivf_nlist,
+                settings.pq_m, pq_nbits or settings.pq_nbits, metric
+            )
+            index.nprobe = settings.ivf_nprobe
+            return index
+        
+        if self.index_type == "sq_fp16":
+            return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, metric)
+        
+        if self.index_type == "sq8":
+            index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, metric)
+            if settings.sq8_rerank_factor > 0:
+                # Scan the int8 codes, then re-rank the best top_k * factor
+                # candidates against float32 copies of the vectors
+                index = faiss.IndexRefineFlat(index)
+                index.k_factor = settings.sq8_rerank_factor
+            return index
+        
+        if self.index_type != "flat":
+            logger.warning(f"Unknown index type '{self.index_type}', using flat index")
+        return faiss.IndexFlatIP(dimension)
+    
+    def _apply_search_params(self):
+        """Apply configured search-time parameters to a loaded index."""
+        settings = config.vector_store
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = settings.hnsw_ef_search
+        elif isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = settings.ivf_nprobe
+        elif isinstance(self.index, faiss.IndexRefine) and settings.sq8_rerank_factor > 0:
+            self.index.k_factor = settings.sq8_rerank_factor
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) array of L2-normalized float32 embeddings."""
+        return _encode_texts(self.embedding_model, texts)
+    
+    def _train_index(self, embeddings: np.ndarray):
+        """Train the index on the first batch of embeddings if it requires training."""
+        if self.index.is_trained:
+            return
+        
+        # IVF needs at least as many training points as lists, and PQ at
+        # least as many as centroids per sub-quantizer (2**nbits)
+        sample = embeddings[:TRAIN_SAMPLE_SIZE]
+        if isinstance(self.index, faiss.IndexIVF):
+            nlist = min(self.index.nlist, len(sample))
+            pq_nbits = None
+            if isinstance(self.index, faiss.IndexIVFPQ):
+                pq_nbits = min(self.index.pq.nbits, max(1, len(sample).bit_length() - 1))
+            if nlist != self.index.nlist or (pq_nbits and pq_nbits != self.index.pq.nbits):
+                self.index = self._build_index(embeddings.shape[1], nlist=nlist, pq_nbits=pq_nbits)
+        
+        # Run the IVF k-means assignment step on the GPU when available. The
+        # index does not own clustering_index, so keep a reference to the GPU
+        # index until training is done and detach it afterwards.
+        gpu_resources = _get_gpu_resources()
+        clustering_index = None
+        if gpu_resources is not None and isinstance(self.index, faiss.IndexIVF):
+            clustering_index = faiss.index_cpu_to_gpu(
+                gpu_resources, 0, faiss.IndexFlatIP(embeddings.shape[1])
+            )
+            self.index.clustering_index = clustering_index
+        
+        logger.info(f"Training index on {len(sample)} embeddings")
+        try:
+            self.index.train(sample)
+        finally:
+            if clustering_index is not None:
+                self.index.clustering_index = None
+    
+    def _add_embeddings(self, embeddings: np.ndarray):
+        """Add embeddings to the index, through a GPU copy for large batches when possible."""
+        self._make_index_writable()
+        
+        gpu_resources = _get_gpu_resources() if len(embeddings) >= GPU_ADD_MIN_BATCH else None
+        
+        # FAISS has GPU implementations for flat and IVF indexes, not HNSW or plain SQ
+        if gpu_resources is not None and isinstance(
+            self.index, (faiss.IndexFlat, faiss.IndexIVFFlat, faiss.IndexIVFPQ)
+        ):
+            try:
+                gpu_index = faiss.index_cpu_to_gpu(gpu_resources, 0, self.index)
+                gpu_index.add(embeddings)
+                self.index = faiss.index_gpu_to_cpu(gpu_index)
+                self._apply_search_params()
+                return
+            except RuntimeError as e:
+                logger.warning(f"GPU add failed, adding on CPU instead: {str(e)}")
+        
+        self.index.add(embeddings)
+    
     async def retrieve_knowledge(
         self, 
         concept: str, 
@@ -79,27 +609,18 @@ class RAGService:
             return self._get_default_knowledge(concept, difficulty)
         
         try:
-            # Determine class level based on age
-            class_level = self._get_class_level_for_age(age) if age else None
-            
-            # Create query with class information
-            if class_level:
-                query = f"{concept} {difficulty} financial education class {class_level} for children"
-            else:
-                query = f"{concept} {difficulty} financial education for children"
+            query = self._build_query(concept, difficulty, age)
             
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0]
-            query_embedding = np.array([query_embedding]).astype('float32')
+            # Generate query embedding off the event loop; the encoder is a
+            # blocking transformer forward pass
+            query_bytes = await asyncio.to_thread(_embed_query, self.embedding_model, query)
+            query_embedding = np.frombuffer(query_bytes, dtype=np.float32).reshape(1, -1)
             
             # Search index
             distances, indices = self.index.search(query_embedding, min(top_k, len(self.documents)))
             
             # Retrieve documents
-            retrieved_docs = []
-            for idx in indices[0]:
-                if idx < len(self.documents):
-                    retrieved_docs.append(self.documents[idx])
+            retrieved_docs = self._collect_documents(indices[0])
             
             # Combine documents
             knowledge = "\n\n".join(retrieved_docs)
@@ -111,28 +632,59 @@ class RAGService:
             logger.error(f"Error retrieving knowledge: {str(e)}")
             return self._get_default_knowledge(concept, difficulty)
     
-    async def add_documents(self, documents: List[str], metadata: List[Dict[str, Any]]):
+    def _build_query(self, concept: str, difficulty: str, age: Optional[int]) -> str:
+        """Build the retrieval query text for a concept."""
+        # Determine class level based on age
+        class_level = self._get_class_level_for_age(age) if age else None
+        
+        # Create query with class information
+        if class_level:
+            return f"{concept} {difficulty} financial education class {class_level} for children"
+        return f"{concept} {difficulty} financial education for children"
+    
+    def _collect_documents(self, indices) -> List[str]:
+        """Decode documents for one row of search results, skipping empty slots (-1)."""
+        count = len(self.documents)
+        return [self.documents[int(idx)] for idx in indices if 0 <= idx < count]
+    
+    async def add_documents(
+        self,
+        documents: List[str],
+        metadata: List[Dict[str, Any]],
+        save: bool = True
+    ):
         """
         Add documents to vector store.
         
         Args:
             documents: List of document texts
             metadata: List of metadata dictionaries
+            save: Whether to persist the documents after adding. They are
+                appended to the write-ahead log; the full index is only
+                rewritten when the log is compacted.
         """
         logger.info(f"Adding {len(documents)} documents to index")
         
         try:
             # Generate embeddings
-            embeddings = self.embedding_model.encode(documents)
-            embeddings = np.array(embeddings).astype('float32')
+            embeddings = await asyncio.to_thread(self._encode, documents)
             
             # Add to index
-            self.index.add(embeddings)
+            base = len(self.documents)
+            self._train_index(embeddings)
+            self._add_embeddings(embeddings)
             self.documents.extend(documents)
             self.metadata.extend(metadata)
+            self._dirty = True
             
-            # Auto-save after adding documents
-            self.save_index()
+            # Persist only the new documents, unless earlier unsaved adds are
+            # missing from the log and a full save is needed anyway
+            if not save:
+                self._unlogged = True
+            elif self._unlogged:
+                self.save_index()
+            else:
+                self._append_wal(base, embeddings, documents, metadata)
 
             logger.info(f"Successfully added documents. Total: {len(self.documents)}")
             
@@ -140,24 +692,85 @@ class RAGService:
             logger.error(f"Error adding documents: {str(e)}")
             raise
     
-    def save_index(self):
-        """Save index and metadata to disk."""
-        index_path = Path(config.vector_store.index_path)
-        metadata_path = Path(config.vector_store.metadata_path)
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index still has to be trained by the next add_documents call."""
+        return not self.index.is_trained
+    
+    @property
+    def has_unsaved_changes(self) -> bool:
+        """Whether documents were added since the index was last saved."""
+        return self._dirty
+    
+    def save_index(self, force: bool = False):
+        """
+        Save index and metadata to disk.
+        
+        Files are written to temporary paths and then atomically moved into
+        place, with the manifest last. If a crash interrupts the moves, the
+        next load finishes them from the temporary files; files that still
+        do not match the manifest are rejected rather than pairing documents
+        with the wrong vectors.
+        
+        Args:
+            force: Save even if nothing changed since the last save
+        """
+        if not self._dirty and not force:
+            logger.info("Index unchanged since last save, skipping write")
+            return
+        
+        paths = _store_paths()
+        tmp_paths = {name: _tmp_path(path) for name, path in paths.items()}
+        index_path = paths["index"]
+        documents_path = paths["documents"]
+        documents_tmp = tmp_paths["documents"]
+        offsets_path = paths["offsets"]
+        manifest_path = Path(config.vector_store.manifest_path)
+        manifest_tmp = _tmp_path(manifest_path)
         
         # Create directory if it doesn't exist
         index_path.parent.mkdir(parents=True, exist_ok=True)
         
         try:
             # Save FAISS index
-            faiss.write_index(self.index, str(index_path))
-            
-            # Save metadata
-            with open(metadata_path, 'wb') as f:
-                pickle.dump({
-                    'documents': self.documents,
-                    'metadata': self.metadata
-                }, f)
+            faiss.write_index(self.index, str(tmp_paths["index"]))
+            
+            # Save documents and metadata
+            self.documents.write(documents_tmp, tmp_paths["offsets"])
+            tmp_paths["metadata"].write_bytes(dump_json(self.metadata))
+            
+            # Written only once every other file is complete, so a load can
+            # tell a finished set of temporary files from a partial one
+            manifest = {"version": _MANIFEST_VERSION, "files": _file_sizes(tmp_paths)}
+            manifest_tmp.write_bytes(dump_json(manifest))
+            
+            # Windows cannot replace a file that is memory-mapped, so release
+            # the mappings of the saved files first
+            self._make_index_writable()
+            mapped_path = self.documents.path
+            mapped_offsets = self.documents.offsets_path
+            self.documents.close()
+            try:
+                for name, path in paths.items():
+                    os.replace(tmp_paths[name], path)
+                os.replace(manifest_tmp, manifest_path)
+            except BaseException:
+                if not documents_tmp.exists():
+                    # The new documents file is already in place; its
+                    # offsets are replaced right after it and may not be
+                    new_offsets = None if tmp_paths["offsets"].exists() else offsets_path
+                    self.documents.load(documents_path, new_offsets)
+                elif mapped_path is not None:
+                    # Map the previous file again; documents added since
+                    # the last save are still pending
+                    self.documents.load(mapped_path, mapped_offsets, keep_pending=True)
+                raise
+            self.documents.load(documents_path, offsets_path)
+            self._dirty = False
+            self._unlogged = False
+            
+            # Everything in the log is now part of the saved index
+            Path(config.vector_store.wal_path).unlink(missing_ok=True)
             
             logger.info(f"Index saved to {index_path}")
             
@@ -48,6 +48,7 @@ echo ""
 echo "Installing dependencies..."
 pip install --upgrade pip -q
 pip install -r requirements.txt -q
+pip install -e . -q
 echo -e "${GREEN}✓ Dependencies installed${NC}"
 echo ""
 
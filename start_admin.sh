@@ -30,6 +30,7 @@ fi
 # Install dependencies if needed
 echo "📚 Checking dependencies..."
 pip install -q -r requirements.txt
+pip install -q -e .
 
 # Check if MCP server is running
 echo "🔍 Checking if MCP server is running..."
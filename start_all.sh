@@ -31,6 +31,7 @@ fi
 # Install dependencies if needed
 echo "📚 Checking dependencies..."
 pip install -q -r requirements.txt
+pip install -q -e .
 
 # Check if vector store exists
 if [ ! -f "data/vector_store/education.index" ]; then
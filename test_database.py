@@ -2,6 +2,7 @@
 """Test script to verify SQLite database integration."""
 
 import sys
+import tempfile
 from pathlib import Path
 
 # Add parent directory to path
@@ -10,7 +11,19 @@ sys.path.append(str(Path(__file__).parent))
 import database as db
 
 def test_database():
-    """Test all database functions."""
+    """Test all database functions against a throwaway copy of the schema."""
+    original_path = db.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Keep test rows out of the tracked data/quiz_data.db
+        db.DB_PATH = Path(tmp_dir) / "quiz_data.db"
+        try:
+            return _check_database()
+        finally:
+            db.close_pool()
+            db.DB_PATH = original_path
+
+def _check_database():
+    """Run each database check in order, returning False at the first failure."""
     print("🧪 Testing SQLite Database Integration\n")
     
     # 1. Initialize database
@@ -25,96 +38,102 @@ def test_database():
         print("   ❌ Database file not found!\n")
         return False
     
-    # 2. Test user creation
-    print("2️⃣ Testing user creation...")
-    test_user_id = "test_user_123"
-    success = db.save_user(
-        user_id=test_user_id,
-        name="Test User",
-        age=10,
-        hobbies=["reading", "sports"],
-        interests=["technology", "nature"],
-        learning_style="visual"
-    )
-    
-    if success:
-        print("   ✅ User saved successfully")
+    # Steps 2-5 share one transaction, committed once when the block exits
+    with db.batch() as conn:
+        # 2. Test user creation
+        print("2️⃣ Testing user creation...")
+        test_user_id = "test_user_123"
+        success = db.save_user(
+            user_id=test_user_id,
+            name="Test User",
+            age=10,
+            hobbies=["reading", "sports"],
+            interests=["technology", "nature"],
+            learning_style="visual",
+            conn=conn
+        )
+    
+        if success:
+            print("   ✅ User saved successfully")
         
-        # Retrieve user
-        user = db.get_user(test_user_id)
-        if user:
-            print(f"   ✅ User retrieved: {user['name']}, Age: {user['age']}")
-            print(f"   📚 Hobbies: {user['hobbies']}")
-            print(f"   🎯 Interests: {user['interests']}\n")
+            # Retrieve user
+            user = db.get_user(test_user_id, conn=conn)
+            if user:
+                print(f"   ✅ User retrieved: {user['name']}, Age: {user['age']}")
+                print(f"   📚 Hobbies: {user['hobbies']}")
+                print(f"   🎯 Interests: {user['interests']}\n")
+            else:
+                print("   ❌ Failed to retrieve user\n")
+                return False
         else:
-            print("   ❌ Failed to retrieve user\n")
+            print("   ❌ Failed to save user\n")
             return False
-    else:
-        print("   ❌ Failed to save user\n")
-        return False
     
-    # 3. Test gamification data
-    print("3️⃣ Testing gamification data...")
-    gamif = db.get_gamification_data(test_user_id)
-    print(f"   ✅ Initial gamification data:")
-    print(f"      Level: {gamif['level']}")
-    print(f"      Points: {gamif['total_points']}")
-    print(f"      Quizzes: {gamif['quizzes_completed']}\n")
-    
-    # 4. Test quiz result saving
-    print("4️⃣ Testing quiz result saving...")
-    sample_answers = [
-        {
-            'question_id': 'q1',
-            'question_text': 'What is 2+2?',
-            'correct_answer': '4',
-            'user_answer': '4',
-            'is_correct': True
-        },
-        {
-            'question_id': 'q2',
-            'question_text': 'What is the capital of France?',
-            'correct_answer': 'Paris',
-            'user_answer': 'Paris',
-            'is_correct': True
-        }
-    ]
-    
-    quiz_result_id = db.save_quiz_result(
-        user_id=test_user_id,
-        quiz_id="quiz_001",
-        concept="basic_math",
-        score=2,
-        total_questions=2,
-        answers=sample_answers
-    )
-    
-    if quiz_result_id:
-        print(f"   ✅ Quiz result saved with ID: {quiz_result_id}\n")
-    else:
-        print("   ❌ Failed to save quiz result\n")
-        return False
-    
-    # 5. Test gamification update
-    print("5️⃣ Testing gamification update...")
-    success = db.update_gamification_data(
-        user_id=test_user_id,
-        points_earned=50,
-        is_perfect_score=True,
-        new_badges=["first_quiz"]
-    )
-    
-    if success:
-        gamif = db.get_gamification_data(test_user_id)
-        print(f"   ✅ Gamification updated:")
+        # 3. Test gamification data
+        print("3️⃣ Testing gamification data...")
+        gamif = db.get_gamification_data(test_user_id, conn=conn)
+        print(f"   ✅ Initial gamification data:")
         print(f"      Level: {gamif['level']}")
         print(f"      Points: {gamif['total_points']}")
-        print(f"      Quizzes: {gamif['quizzes_completed']}")
-        print(f"      Perfect Scores: {gamif['perfect_scores']}")
-        print(f"      Badges: {gamif['badges']}\n")
-    else:
-        print("   ❌ Failed to update gamification\n")
-        return False
+        print(f"      Quizzes: {gamif['quizzes_completed']}\n")
+    
+        # 4. Test quiz result saving
+        print("4️⃣ Testing quiz result saving...")
+        sample_answers = [
+            {
+                'question_id': 'q1',
+                'question_text': 'What is 2+2?',
+                'correct_answer': '4',
+                'user_answer': '4',
+                'is_correct': True
+            },
+            {
+                'question_id': 'q2',
+                'question_text': 'What is the capital of France?',
+                'correct_answer': 'Paris',
+                'user_answer': 'Paris',
+                'is_correct': True
+            }
+        ]
+    
+        quiz_result_id = db.save_quiz_result(
+            user_id=test_user_id,
+            quiz_id="quiz_001",
+            concept="basic_math",
+            score=2,
+            total_questions=2,
+            answers=sample_answers,
+            conn=conn
+        )
+    
+        if quiz_result_id:
+            print(f"   ✅ Quiz result saved with ID: {quiz_result_id}\n")
+        else:
+            print("   ❌ Failed to save quiz result\n")
+            return False
+    
+        # 5. Test gamification update
+        print("5️⃣ Testing gamification update...")
+        success = db.update_gamification_data(
+            user_id=test_user_id,
+            points_earned=50,
+            is_perfect_score=True,
+            new_badges=["first_quiz"],
+            conn=conn
+        )
+    
+        if success:
+            gamif = db.get_gamification_data(test_user_id, conn=conn)
+            print(f"   ✅ Gamification updated:")
+            print(f"      Level: {gamif['level']}")
+            print(f"      Points: {gamif['total_points']}")
+            print(f"      Quizzes: {gamif['quizzes_completed']}")
+            print(f"      Perfect Scores: {gamif['perfect_scores']}")
+            print(f"      Badges: {gamif['badges']}\n")
+        else:
+            print("   ❌ Failed to update gamification\n")
+            return False
+    
     
     # 6. Test quiz history retrieval
     print("6️⃣ Testing quiz history retrieval...")
@@ -143,6 +162,81 @@ def test_database():
     all_users = db.get_all_users()
     print(f"   ✅ Retrieved {len(all_users)} user(s) from database\n")
     
+    # 9. Test feedback storage
+    print("9️⃣ Testing feedback storage...")
+    saved = db.save_feedback([{
+        'feedback_id': 'fb_test_001',
+        'quiz_id': 'quiz_001',
+        'user_id': test_user_id,
+        'rating': 4,
+        'difficulty_rating': 'just_right'
+    }])
+    if saved is None:
+        print("   ❌ Failed to save feedback\n")
+        return False
+    
+    quiz_feedback = db.get_feedback(quiz_id="quiz_001")
+    print(f"   ✅ Retrieved {len(quiz_feedback)} feedback entries for quiz_001")
+    print(f"      Average rating: {db.get_average_feedback_rating():.2f}")
+    print(f"      Difficulty: {db.get_difficulty_counts()}\n")
+    
+    # 10. Test batch rollback
+    print("🔟 Testing batch rollback...")
+    rollback_user_id = "test_batch_rollback"
+    try:
+        with db.batch():
+            # Called without conn, so it must still join the batch's transaction
+            db.save_user(user_id=rollback_user_id, name="Rolled Back")
+            raise RuntimeError("abort batch")
+    except RuntimeError:
+        pass
+    
+    if db.get_user(rollback_user_id) is None:
+        print("   ✅ Writes inside a failed batch were rolled back\n")
+    else:
+        print("   ❌ A failed batch left its writes behind\n")
+        return False
+    
+    # 11. Test rollback on interrupt
+    print("1️⃣1️⃣ Testing rollback on interrupt...")
+    interrupted_user_id = "test_interrupted_write"
+    try:
+        with db.get_db_connection() as conn:
+            db.save_user(user_id=interrupted_user_id, name="Interrupted", conn=conn)
+            raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    
+    # The next helper commits on the same pooled connection
+    db.update_gamification_data(user_id=test_user_id, points_earned=0)
+    if db.get_user(interrupted_user_id) is None:
+        print("   ✅ Writes before an interrupt were rolled back\n")
+    else:
+        print("   ❌ An interrupted transaction was committed by the next helper\n")
+        return False
+
+    # 12. Test nested batch rollback
+    print("1️⃣2️⃣ Testing nested batch rollback...")
+    outer_user_id = "test_outer_batch"
+    inner_user_id = "test_inner_batch"
+    with db.batch() as conn:
+        db.save_user(user_id=outer_user_id, name="Outer", conn=conn)
+        try:
+            with db.batch() as inner_conn:
+                db.save_user(user_id=inner_user_id, name="Inner", conn=inner_conn)
+                raise RuntimeError("abort nested batch")
+        except RuntimeError:
+            pass
+        # The outer batch keeps going after its savepoint was rolled back
+        db.update_gamification_data(user_id=outer_user_id, points_earned=10, conn=conn)
+
+    outer_points = db.get_gamification_data(outer_user_id)['total_points']
+    if db.get_user(outer_user_id) and outer_points == 10 and db.get_user(inner_user_id) is None:
+        print("   ✅ Only the failed nested batch was rolled back\n")
+    else:
+        print("   ❌ A failed nested batch did not roll back just its own writes\n")
+        return False
+
     print("=" * 60)
     print("🎉 All database tests passed successfully!")
     print("=" * 60)
@@ -153,7 +247,8 @@ def test_database():
 
 if __name__ == "__main__":
     try:
-        test_database()
+        if not test_database():
+            sys.exit(1)
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
         import traceback
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Test script to verify the vector store survives crashes and bad saves."""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+import services.rag_service as rag
+from config import config
+from scripts.load_knowledge_base import _ingest_documents
+
+# Vector store files, keyed by the config attribute they are stored under
+STORE_FILES = {
+    "index_path": "education.index",
+    "metadata_path": "metadata.json",
+    "documents_path": "documents.bin",
+    "offsets_path": "documents.offsets.npy",
+    "wal_path": "wal.bin",
+    "manifest_path": "manifest.json",
+}
+
+class FakeEncoder:
+    """Deterministic stand-in for the embedding model, so no download is needed."""
+
+    def encode(self, texts, **kwargs):
+        vectors = np.stack([
+            np.random.default_rng(sum(text.encode('utf-8'))).standard_normal(config.embeddings.dimension)
+            for text in texts
+        ]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_rag_service():
+    """Test the vector store against throwaway files and a fake encoder."""
+    vector_store = config.vector_store
+    original_settings = {name: getattr(vector_store, name) for name in [*STORE_FILES, "index_type"]}
+    original_encoder = rag._get_encoder
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Keep test documents out of the real data/vector_store
+        for name, file_name in STORE_FILES.items():
+            setattr(vector_store, name, str(Path(tmp_dir) / file_name))
+        vector_store.index_type = "flat"
+        rag._get_encoder = lambda model_name, device: FakeEncoder()
+        try:
+            return _check_rag_service(Path(tmp_dir))
+        finally:
+            rag._get_encoder = original_encoder
+            for name, value in original_settings.items():
+                setattr(vector_store, name, value)
+
+def vector_store_path(name):
+    """Return the configured vector store path for a config attribute."""
+    return getattr(config.vector_store, name)
+
+def _stored_documents(service):
+    """Return every document text held by a RAGService."""
+    return [service.documents[i] for i in range(len(service.documents))]
+
+def _topic_stream(count):
+    """Yield (text, metadata) pairs shaped like load_json_knowledge_base() output."""
+    for i in range(count):
+        yield f"Topic {i} text", {"source": "class_5.json", "class": "5", "topic": f"Topic {i}"}
+
+def _check_rag_service(store_dir):
+    """Run each vector store check in order, returning False at the first failure."""
+    print("🧪 Testing Vector Store Persistence\n")
+
+    # 1. Document store round-trip
+    print("1️⃣ Testing document store round-trip...")
+    texts = ["Saving money", "Intérêt composé 💰", ""]
+    store = rag._DocumentStore()
+    store.extend(texts[:2])
+    store.write(store_dir / "round_trip.bin", store_dir / "round_trip.npy")
+    store.load(store_dir / "round_trip.bin", store_dir / "round_trip.npy")
+    store.extend(texts[2:])
+    store.write(store_dir / "round_trip2.bin", store_dir / "round_trip2.npy")
+    store.load(store_dir / "round_trip2.bin", store_dir / "round_trip2.npy")
+    mapped = [store[i] for i in range(len(store))]
+    # Stores saved without an offsets file are scanned instead
+    store.load(store_dir / "round_trip2.bin")
+    scanned = [store[i] for i in range(len(store))]
+    store.close()
+
+    if mapped == texts and scanned == texts:
+        print(f"   ✅ {len(texts)} documents read back, with and without saved offsets\n")
+    else:
+        print(f"   ❌ Expected {texts}, got {mapped} (mapped) and {scanned} (scanned)\n")
+        return False
+
+    # 2. Write-ahead log replay after a crash
+    print("2️⃣ Testing write-ahead log replay...")
+    service = rag.RAGService()
+    asyncio.run(service.add_documents(["Budgeting basics"], [{"topic": "budget"}]))
+    service.save_index()
+    asyncio.run(service.add_documents(["Needs and wants"], [{"topic": "needs"}]))
+    # Simulate a crash: the process dies without saving the index, part
+    # way through appending the next log record
+    with open(vector_store_path("wal_path"), 'ab') as f:
+        f.write(rag._WAL_HEADER.pack(2, 1, config.embeddings.dimension)[:7])
+    service.documents.close()
+
+    service = rag.RAGService()
+    if _stored_documents(service) == ["Budgeting basics", "Needs and wants"] and service.index.ntotal == 2:
+        print("   ✅ Logged documents replayed and the torn record discarded\n")
+    else:
+        print(f"   ❌ Replayed store holds {_stored_documents(service)}\n")
+        return False
+
+    # 3. Interrupted save
+    print("3️⃣ Testing recovery from an interrupted save...")
+    original_replace = os.replace
+    replaced = []
+    def crash_after_first_replace(src, dst):
+        if replaced:
+            raise KeyboardInterrupt
+        replaced.append(src)
+        original_replace(src, dst)
+
+    rag.os.replace = crash_after_first_replace
+    try:
+        service.save_index()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rag.os.replace = original_replace
+    service.documents.close()
+
+    service = rag.RAGService()
+    manifest_tmp = rag._tmp_path(Path(vector_store_path("manifest_path")))
+    if len(service.documents) == service.index.ntotal == 2 and not manifest_tmp.exists():
+        print("   ✅ The save was completed from its temporary files on load\n")
+    else:
+        print("   ❌ The interrupted save was not completed\n")
+        return False
+
+    # 4. Files that do not match the manifest
+    print("4️⃣ Testing manifest mismatch...")
+    service.documents.close()
+    Path(vector_store_path("metadata_path")).write_bytes(b"[]")
+    try:
+        rag.RAGService()
+        print("   ❌ A store that does not match its manifest was loaded\n")
+        return False
+    except ValueError:
+        print("   ✅ Loading refused instead of serving mismatched files\n")
+
+    if Path(vector_store_path("wal_path")).exists():
+        print("   ✅ Write-ahead log kept after the rejected load\n")
+    else:
+        print("   ❌ Write-ahead log was removed after the rejected load\n")
+        return False
+
+    # 5. Resuming an interrupted knowledge base load
+    print("5️⃣ Testing knowledge base load resume...")
+    for name in STORE_FILES:
+        Path(vector_store_path(name)).unlink(missing_ok=True)
+    service = rag.RAGService()
+    asyncio.run(_ingest_documents(service, _topic_stream(3), 1000, 2))
+    added, skipped, _ = asyncio.run(_ingest_documents(rag.RAGService(), _topic_stream(5), 1000, 2))
+    if (added, skipped) == (2, 3):
+        print("   ✅ Topics already in the store were skipped\n")
+    else:
+        print(f"   ❌ Resumed load added {added} and skipped {skipped}, expected 2 and 3\n")
+        return False
+
+    # An emptied store has to be rebuilt in full
+    for name in STORE_FILES:
+        Path(vector_store_path(name)).unlink(missing_ok=True)
+    added, skipped, _ = asyncio.run(_ingest_documents(rag.RAGService(), _topic_stream(5), 1000, 2))
+    if (added, skipped) == (5, 0):
+        print("   ✅ Every topic was loaded into an emptied store\n")
+    else:
+        print(f"   ❌ Emptied store got {added} added and {skipped} skipped, expected 5 and 0\n")
+        return False
+
+    print("=" * 60)
+    print("🎉 All vector store tests passed successfully!")
+    print("=" * 60)
+
+    return True
+
+if __name__ == "__main__":
+    try:
+        if not test_rag_service():
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
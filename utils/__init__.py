@@ -2,5 +2,6 @@
 
 from .logging_utils import setup_logging, AgentTracer
 from .feedback_processor import FeedbackProcessor
+from .json_utils import dump_json, load_json, read_json
 
-__all__ = ["setup_logging", "AgentTracer", "FeedbackProcessor"]
+__all__ = ["setup_logging", "AgentTracer", "FeedbackProcessor", "dump_json", "load_json", "read_json"]
@@ -0,0 +1,27 @@
+"""JSON encoding and decoding helpers backed by orjson."""
+
+import mmap
+import os
+from typing import Any
+
+import orjson
+
+# Files larger than this are memory-mapped and parsed in place instead of
+# being read into an intermediate bytes copy
+MMAP_THRESHOLD = 1024 * 1024
+
+def dump_json(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes."""
+    return orjson.dumps(obj)
+
+def load_json(data) -> Any:
+    """Parse JSON from bytes, bytearray, memoryview or str."""
+    return orjson.loads(data)
+
+def read_json(file_path) -> Any:
+    """Parse a JSON file, memory-mapping large files."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return orjson.loads(f.read())
@@ -2,6 +2,7 @@
 
 import logging
 import sys
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 import colorlog
@@ -56,9 +57,10 @@ def setup_logging(log_level: str = "INFO", log_file: str = None):
 class AgentTracer:
     """Utility for tracing agent execution flow."""
     
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, max_traces: int = 1000):
         self.logger = logger
-        self.traces = []
+        # Only the most recent max_traces steps are kept, so long sessions stay bounded
+        self.traces = deque(maxlen=max_traces)
     
     def log_step(self, agent_name: str, action: str, details: dict = None):
         """Log an agent execution step."""
@@ -79,15 +81,16 @@ class AgentTracer:
         if not self.traces:
             return "No traces recorded"
         
-        summary = "\n=== Agent Execution Trace ===\n"
+        # Collect the pieces and join once instead of re-copying the string per entry
+        parts = ["\n=== Agent Execution Trace ===\n"]
         for i, trace in enumerate(self.traces, 1):
-            summary += f"\n{i}. [{trace['timestamp']}] {trace['agent']}\n"
-            summary += f"   Action: {trace['action']}\n"
+            parts.append(f"\n{i}. [{trace['timestamp']}] {trace['agent']}\n")
+            parts.append(f"   Action: {trace['action']}\n")
             if trace['details']:
-                summary += f"   Details: {trace['details']}\n"
+                parts.append(f"   Details: {trace['details']}\n")
         
-        return summary
+        return "".join(parts)
     
     def clear_traces(self):
         """Clear all traces."""
-        self.traces = []
+        self.traces.clear()
@@ -6,6 +6,8 @@ Checks all dependencies and configurations.
 
 import sys
 import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def check_python_version():
@@ -34,17 +36,16 @@ def check_dependencies():
         'yaml'
     ]
     
+    # find_spec locates each package without executing its import-time code;
+    # the lookups mostly wait on the filesystem, so run them side by side
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        specs = list(executor.map(importlib.util.find_spec, required_packages))
+    
     missing = []
-    for package in required_packages:
-        try:
-            if package == 'yaml':
-                __import__('yaml')
-            elif package == 'faiss':
-                __import__('faiss')
-            else:
-                __import__(package)
+    for package, spec in zip(required_packages, specs):
+        if spec is not None:
             print(f"✅ {package}")
-        except ImportError:
+        else:
             print(f"❌ {package}")
             missing.append(package)
     